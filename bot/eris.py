@@ -30,18 +30,31 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+import time
+import uuid
+import asyncio
 import logging
 import traceback
+import collections
+from typing import Any, Awaitable, Optional
+
+import aiohttp
+import aioredis
+import asyncpg
 import colorama
 import discord
 from discord.ext import commands
 
 import config
+from utils import backoff
 from utils import http
+from utils import metrics
 from utils import cache
 from utils import database
 from utils import modules
 from utils.context import ErisContext
+from utils.monitor import LoopMonitor
+from utils.profiler import StartupProfiler
 
 
 # Quando for remover o Jishaku.
@@ -63,11 +76,47 @@ RESET  = colorama.Style.RESET_ALL
 COSMIC_GUILD_ID = 795017809402921041
 STAFF_ROLE_ID   = 795026574453899304
 
+# Limites do cache de prefixos em memória. O TTL é só uma garantia
+# extra, as alterações são avisadas pelo canal `config/prefix`.
+PREFIX_CACHE_SIZE = 10000
+PREFIX_CACHE_TTL  = 600
+
+# Limites do cache de membros. No modo econômico o servidor não é
+# carregado inteiro, então quem não está no cache é buscado via HTTP.
+MEMBER_CACHE_SIZE = 5000
+MEMBER_CACHE_TTL  = 3600
+
 
 class Eris(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.all()
-        super().__init__(command_prefix=get_prefix, intents=intents)
+    def __init__(self, *, profiler: Optional[StartupProfiler] = None, profile_startup: Optional[str] = None):
+        # Quanto tempo cada fase da inicialização levou. Caso
+        # `profile_startup` seja passado, o relatório é salvo
+        # neste caminho quando a inicialização terminar.
+        self.profiler = profiler or StartupProfiler()
+        self.profile_startup = profile_startup
+
+        # No modo econômico (`lean = True` no config) o bot não recebe
+        # presenças e não baixa a lista de membros ao conectar. Somente
+        # quem entrar no servidor enquanto o bot estiver online fica
+        # guardado no cache do discord.py.
+        self.lean = getattr(config, 'lean', False)
+
+        if self.lean:
+            intents = discord.Intents.default()
+            intents.members = True
+
+            member_cache_flags = discord.MemberCacheFlags.none()
+            member_cache_flags.joined = True
+
+            options = {
+                'member_cache_flags': member_cache_flags,
+                'chunk_guilds_at_startup': False
+            }
+        else:
+            intents = discord.Intents.all()
+            options = {}
+
+        super().__init__(command_prefix=get_prefix, intents=intents, **options)
 
         loop = self.loop
         run = loop.run_until_complete
@@ -75,29 +124,70 @@ class Eris(commands.Bot):
         self.is_first_launch = True
         self.default_prefix = '?'
 
-        # Criar sessão HTTP com `aiohttp`.
-        log.info('Creating client HTTP session.')
-        self.session = run(http.create_session(connector=self.http.connector, loop=loop))
+        # Primeira camada do cache de prefixos, assim a maioria
+        # das mensagens não precisa de nenhuma ida ao Redis.
+        self.prefixes = cache.LRUCache(max_size=PREFIX_CACHE_SIZE, ttl=PREFIX_CACHE_TTL)
+
+        # Membros buscados via HTTP (ou vistos em mensagens) que não
+        # estão no cache do servidor. `None` indica que o membro não
+        # está mais no servidor, assim não buscamos ele de novo.
+        self.members = cache.LRUCache(max_size=MEMBER_CACHE_SIZE, ttl=MEMBER_CACHE_TTL)
+
+        # Quantas mensagens foram descartadas antes de criar
+        # um contexto e quantas foram processadas como comando.
+        self.message_stats = collections.Counter()
+
+        # Latência, erros e execuções em andamento de cada
+        # listener e comando. Pode ser exposto para o Prometheus
+        # caso `metrics_port` esteja definido no config.
+        self.metrics = metrics.Metrics()
+        self.metrics_server = None
+
+        # Mede o atraso do event loop e avisa quais callbacks
+        # (e de quais cogs) bloquearam o loop por muito tempo.
+        self.loop_monitor = LoopMonitor(self.loop)
+        self.loop_monitor.start()
+
+        # Criar a sessão HTTP e as conexões com o Redis e o PostgreSQL
+        # ao mesmo tempo, assim um serviço lento não atrasa os outros.
+        log.info('Creating HTTP session and connections with Redis and PostgreSQL.')
+        self.session, self.cache, self.pool = run(self.connect())
 
-        # Criar conexão com o Redis (cache).
-        log.info('Creating connection with Redis.')
-        self.cache = run(cache.create_cache(config.redis, loop=loop))
+        # Se o bot foi desligado corretamente então o cache ainda é
+        # válido e os cogs podem pular o carregamento. O mesmo vale
+        # quando outros processos estão rodando: eles mantêm o cache
+        # atualizado e recarregá-lo apagaria o que ainda não foi
+        # salvo no banco de dados por eles.
+        clean = run(cache.pop_clean_shutdown(self.cache))
+        peers = run(cache.count_live_instances(self.cache))
 
-        # Criar conexão com o PostgreSQL (banco de dados).
-        log.info('Creating connection with PostgreSQL.')
-        self.pool = run(database.create_pool(config.postgres, loop=loop))
+        self.warm_restart = clean or peers > 0
+
+        if peers:
+            log.info(f'Found {peers} other running instances, keeping the cache.')
+
+        self.instance_id = uuid.uuid4().hex
+        run(cache.register_instance(self.cache, self.instance_id))
+        self._heartbeat_task = loop.create_task(self.heartbeat())
+
+        metrics_port = getattr(config, 'metrics_port', None)
+
+        if metrics_port:
+            self.metrics_server = run(metrics.start_server(self.metrics, metrics_port))
 
         # Carregar as extensões do bot.
         log.info('Loading all initial extensions.')
         for ext in modules.get_all_extensions():
             self.load_extension(ext)
 
-        # Carregar o Jishaku já que ele será útil por enquanto.
-        self.load_extension('jishaku')
+        # O Jishaku é pesado e só é útil durante o desenvolvimento,
+        # então ele só é carregado caso `jishaku = True` no config.
+        if getattr(config, 'jishaku', False):
+            self.load_extension('jishaku')
 
-        # Dispachar um evento para que cada cog
-        # faça suas configurações necessárias.
-        self.dispatch('bot_load')
+        # Cada cog faz suas configurações necessárias
+        # (como carregar o cache) ao mesmo tempo.
+        self._warm_up_task = loop.create_task(self.warm_up())
 
     @property
     def cosmic(self) -> discord.Guild:
@@ -107,7 +197,122 @@ class Eris(commands.Bot):
     def staff_role(self) -> discord.Role:
         return self.cosmic.get_role(STAFF_ROLE_ID)
 
+    async def get_or_fetch_member(self, member_id: int) -> Optional[discord.Member]:
+        '''Tenta pegar um membro do cache, caso não consiga, faz
+        uma requisição HTTP e guarda o resultado no cache de membros.
+
+        Parameters
+        ----------
+        member_id: :class:`int`
+            O ID do membro.
+
+        Returns
+        -------
+        Optional[:class:`discord.Member`]
+            O membro desejado ou `None` caso não tenha sido encontrado.
+        '''
+        member = self.cosmic.get_member(member_id)
+
+        if member:
+            return member
+
+        member = self.members.get(member_id)
+
+        if member is not cache.MISSING:
+            return member
+
+        try:
+            member = await self.cosmic.fetch_member(member_id)
+        except discord.NotFound:
+            member = None
+        except discord.HTTPException:
+            # Um erro temporário não deve ficar no cache.
+            return None
+
+        self.members.set(member_id, member)
+        return member
+
+    async def timed(self, phase: str, coro: Awaitable[Any]) -> Any:
+        '''Executa uma corotina e guarda quanto tempo ela levou.
+
+        Parameters
+        ----------
+        phase: :class:`str`
+            O nome da fase da inicialização.
+        coro: Awaitable[:class:`typing.Any`]
+            A corotina a ser executada.
+
+        Returns
+        -------
+        :class:`typing.Any`
+            O resultado da corotina.
+        '''
+        start = time.perf_counter()
+
+        try:
+            return await coro
+        finally:
+            elapsed = time.perf_counter() - start
+            self.profiler.record(phase, elapsed)
+
+            log.info(f"Startup phase '{phase}' took {elapsed:.3f}s.")
+
+    async def connect(self) -> tuple[aiohttp.ClientSession, aioredis.Redis, asyncpg.Pool]:
+        loop = self.loop
+
+        session = http.create_session(connector=self.http.connector, loop=loop)
+        redis = backoff.retry(lambda: cache.create_cache(config.redis, loop=loop), name='Redis connection')
+
+        exceptions = (*backoff.RETRY_EXCEPTIONS, asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError)
+        postgres = backoff.retry(lambda: database.create_pool(config.postgres, loop=loop),
+                                 name='PostgreSQL connection', exceptions=exceptions)
+
+        return await asyncio.gather(
+            self.timed('connect:http', session),
+            self.timed('connect:redis', redis),
+            self.timed('connect:postgres', postgres)
+        )
+
+    async def warm_up(self):
+        # Os listeners de `on_bot_load` rodam ao mesmo tempo e
+        # cada um tem seu tempo medido separadamente.
+        async def run(listener):
+            try:
+                await self.timed(f'on_bot_load:{listener.__qualname__}', listener())
+            except Exception:
+                log.exception(f"Listener '{listener.__qualname__}' could not load.")
+
+        listeners = self.extra_events.get('on_bot_load', [])
+        await self.timed('warm_up', asyncio.gather(*map(run, listeners)))
+
+        self.profiler.mark('warm_up')
+
+    async def heartbeat(self):
+        # Mantém este processo na lista de processos vivos.
+        while True:
+            await asyncio.sleep(cache.INSTANCE_HEARTBEAT)
+
+            try:
+                await cache.register_instance(self.cache, self.instance_id)
+            except (OSError, aioredis.RedisError):
+                log.exception('Could not renew instance heartbeat.')
+
+    async def wait_until_warm(self):
+        '''Espera todos os listeners de `on_bot_load` terminarem,
+        tendo eles conseguido carregar o cache ou não.
+        '''
+        await asyncio.shield(self._warm_up_task)
+
+    async def write_startup_profile(self):
+        # O relatório só fica completo quando o cache terminar de carregar.
+        await self.wait_until_warm()
+
+        self.profiler.dump(self.profile_startup)
+        log.info(f"Startup profile written to '{self.profile_startup}'.")
+
     def load_extension(self, name: str):
+        start = time.perf_counter()
+
         try:
             super().load_extension(name)
         except Exception:
@@ -116,17 +321,105 @@ class Eris(commands.Bot):
             print(DIM + traceback.format_exc() + RESET, end='')
             print(RED + f"[{name}] Extensão não pôde ser carregada." + RESET)
         else:
-            log.info(f"Extension '{name}' has been loaded.")
+            elapsed = time.perf_counter() - start
+            self.profiler.record(f'load_extension:{name}', elapsed)
+
+            log.info(f"Extension '{name}' has been loaded in {elapsed:.3f}s.")
 
             print(GREEN + f"[{name}] Extensão carregada com sucesso." + RESET)
 
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        # Mesmo comportamento do discord.py, mas medindo
+        # quanto tempo cada listener levou e se ele falhou.
+        stat = self.metrics.get('listener', coro.__qualname__)
+        stat.in_flight += 1
+
+        start = time.perf_counter()
+
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            stat.errors += 1
+
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            stat.in_flight -= 1
+            stat.observe(time.perf_counter() - start)
+
+    async def invoke(self, ctx: ErisContext):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        stat = self.metrics.get('command', ctx.command.qualified_name)
+        stat.in_flight += 1
+
+        start = time.perf_counter()
+
+        # Os erros dos comandos não são propagados, eles
+        # são enviados para o `on_command_error`.
+        try:
+            await super().invoke(ctx)
+        finally:
+            stat.in_flight -= 1
+            stat.observe(time.perf_counter() - start)
+
+            if ctx.command_failed:
+                stat.errors += 1
+
     async def process_commands(self, message: discord.Message):
         # Nós sobrescrevemos este método para usar no `Context` personalizado.
         # Também removo umas condições que tinha aqui já que quero migrá-las 
         # para o `on_message`.
+        if not await self.could_be_command(message):
+            self.message_stats['skipped'] += 1
+            return
+
+        self.message_stats['processed'] += 1
+
         ctx = await self.get_context(message, cls=ErisContext)
         await self.invoke(ctx)
 
+    async def could_be_command(self, message: discord.Message) -> bool:
+        '''Verificação rápida que descarta mensagens que com
+        certeza não são comandos, antes de criar o contexto.
+
+        Parameters
+        ----------
+        message: :class:`discord.Message`
+            A mensagem a ser verificada.
+
+        Returns
+        -------
+        :class:`bool`
+            Se a mensagem pode ser um comando.
+        '''
+        content = message.content
+
+        # Os prefixos normalmente já estão no cache em memória.
+        for prefix in await self.get_prefix(message):
+            if prefix:
+                if content.startswith(prefix):
+                    return True
+
+                continue
+
+            # Para quem não usa prefixo, a primeira palavra
+            # precisa ser o nome (ou alias) de um comando.
+            words = content.split(maxsplit=1)
+
+            if words and words[0] in self.all_commands:
+                return True
+
+        return False
+
+    async def on_connect(self):
+        self.profiler.mark('gateway_connect')
+
     async def on_ready(self):
         if self.is_first_launch:
             # Isso é necessário já que alguns cogs usam o evento `on_ready`
@@ -135,7 +428,14 @@ class Eris(commands.Bot):
             self.is_first_launch = False
             self.dispatch('first_launch')
 
-            print(YELLOW + f'[{__name__}] Online com {len(self.users)} usuários.' + RESET)
+            # A diferença entre `gateway_connect` e `first_launch`
+            # é o tempo gasto recebendo os servidores e membros.
+            self.profiler.mark('first_launch')
+
+            if self.profile_startup:
+                self.loop.create_task(self.write_startup_profile())
+
+            print(YELLOW + f'[{__name__}] Online com {self.cosmic.member_count} membros.' + RESET)
 
     async def on_message(self, message: discord.Message):
         # Só quero que o bot responda quando ele estiver pronto,
@@ -152,6 +452,11 @@ class Eris(commands.Bot):
         if message.author.bot:
             return
 
+        # O autor já veio junto com a mensagem, então aproveitamos
+        # para guardá-lo caso ele não esteja no cache do servidor.
+        if self.lean:
+            self.members.set(message.author.id, message.author)
+
         # Caso a mensagem passe pelas condições anteriores
         # então eu dispacho um evento para ser usado em
         # cogs que necessitam dessa mensagem "sanitizada".
@@ -161,6 +466,35 @@ class Eris(commands.Bot):
         await self.process_commands(message)
 
     async def close(self):
+        # Damos uma chance para os cogs salvarem o que ainda
+        # estiver pendente (por exemplo, a experiência em lote).
+        clean = True
+
+        for name, cog in self.cogs.items():
+            cog_close = getattr(cog, 'cog_close', None)
+
+            if cog_close is None:
+                continue
+
+            try:
+                await cog_close()
+            except Exception:
+                clean = False
+                log.exception(f"Cog '{name}' could not be closed.")
+
+        self._heartbeat_task.cancel()
+        await cache.unregister_instance(self.cache, self.instance_id)
+
+        # Com tudo salvo, o cache pode ser reaproveitado
+        # na próxima vez que o bot for ligado.
+        if clean:
+            await cache.mark_clean_shutdown(self.cache)
+
+        self.loop_monitor.stop()
+
+        if self.metrics_server is not None:
+            await self.metrics_server.cleanup()
+
         # Antes de fechar o bot, temos que fechar nossa sessão HTTP.
         # Caso contrário, o `aiohttp` irá reclamar que não fechamos
         # a sessão.
@@ -174,7 +508,16 @@ async def get_prefix(bot: Eris, message: discord.Message) -> list[str]:
     # Tenta obter um prefixo personalizado no cache.
     # Caso não consiga, usa o prefix padrão `?`.
     # `eris ` é um prefixo global e não pode ser mudado.
-    prefix = await bot.cache.get(f'config/user/{message.author.id}/prefix')
+    user_id = message.author.id
+    prefix = bot.prefixes.get(user_id)
+
+    if prefix is cache.MISSING:
+        # Se o prefixo mudar enquanto esperamos o Redis,
+        # o valor antigo não é guardado em memória.
+        version = bot.prefixes.version
+
+        prefix = await bot.cache.get(f'config/user/{user_id}/prefix')
+        bot.prefixes.set(user_id, prefix, version=version)
 
     if prefix is None:
         prefix = bot.default_prefix
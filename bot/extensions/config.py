@@ -30,12 +30,16 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+import asyncio
 import logging
 
+import aioredis
 import discord
 from discord.ext import commands
 
 from eris import Eris
+from utils import cache
+from utils import checks
 from utils import database
 from utils.context import ErisContext
 
@@ -43,6 +47,14 @@ from utils.context import ErisContext
 log = logging.getLogger(__name__)
 
 
+# Versão do formato das keys de configuração no cache.
+CACHE_VERSION = 1
+
+# Canal do Redis usado para avisar que o prefixo de um usuário
+# mudou, assim todos os processos limpam o cache em memória.
+PREFIX_CHANNEL = 'config/prefix'
+
+
 class Configurations(database.Table):
     user_id = database.Column(database.Integer(big=True), primary_key=True)
     prefix = database.Column(database.String)
@@ -55,17 +67,59 @@ class Config(commands.Cog, name='Configurações'):
         self.bot = bot
         self.no_prefix = 'Go wild, você escolheu não usar prefixo.'
 
+        self._listener = bot.loop.create_task(self.listen_prefix_changes())
+
+    def cog_unload(self):
+        self._listener.cancel()
+        self.bot.loop.create_task(self.bot.cache.unsubscribe(PREFIX_CHANNEL))
+
+    async def listen_prefix_changes(self):
+        while not self.bot.is_closed():
+            try:
+                channel, = await self.bot.cache.subscribe(PREFIX_CHANNEL)
+
+                # O que entrou no cache enquanto não estávamos inscritos
+                # pode ter mudado sem que o aviso chegasse até nós.
+                self.bot.prefixes.clear()
+
+                while await channel.wait_message():
+                    user_id = await channel.get(encoding='utf-8')
+                    self.bot.prefixes.invalidate(int(user_id))
+            except (OSError, aioredis.RedisError):
+                log.exception('Lost subscription to prefix changes.')
+            finally:
+                # Os avisos podem ter sido perdidos antes da inscrição
+                # cair, então não podemos confiar no cache.
+                self.bot.prefixes.clear()
+
+            await asyncio.sleep(5)
+
+    async def invalidate_prefix(self, user_id: int):
+        '''Remove o prefixo de um usuário do cache em memória
+        de todos os processos.
+
+        Parameters
+        ----------
+        user_id: :class:`int`
+            O ID do usuário.
+        '''
+        self.bot.prefixes.invalidate(user_id)
+        await self.bot.cache.publish(PREFIX_CHANNEL, user_id)
+
     @commands.Cog.listener()
     async def on_bot_load(self):
         # Carrega os prefixos personalizados no cache.
-        sql = 'SELECT user_id, prefix FROM configurations;'
-        fetch = await self.bot.pool.fetch(sql)
+        def load(pipe, records):
+            pairs = []
 
-        for record in fetch:
-            user_id = record['user_id']
-            prefix = record['prefix']
+            for record in records:
+                pairs.extend((f'config/user/{record["user_id"]}/prefix', record['prefix']))
 
-            await self.bot.cache.set(f'config/user/{user_id}/prefix', prefix)
+            pipe.mset(*pairs)
+
+        sql = 'SELECT user_id, prefix FROM configurations;'
+        await cache.sync_namespace(self.bot.pool, self.bot.cache, sql, load, name='config',
+                                   version=CACHE_VERSION, pattern='config/user/*', warm=self.bot.warm_restart)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
@@ -75,6 +129,7 @@ class Config(commands.Cog, name='Configurações'):
         await self.bot.pool.execute(sql, member.id)
 
         await self.bot.cache.delete(f'config/user/{member.id}/prefix')
+        await self.invalidate_prefix(member.id)
 
     @commands.group(invoke_without_command=True, ignore_extra=False)
     async def prefix(self, ctx: ErisContext):
@@ -115,11 +170,18 @@ class Config(commands.Cog, name='Configurações'):
             # não pode usar este prefixo.
             return await ctx.reply('Este já é um prefixo global.')
         else:
-            sql = 'UPDATE configurations SET prefix = $2 WHERE user_id = $1;'
+            sql = '''
+                INSERT INTO configurations (user_id, prefix)
+                VALUES ($1, $2)
+                ON CONFLICT (user_id)
+                DO UPDATE SET prefix = excluded.prefix;
+            '''
             await ctx.pool.execute(sql, ctx.author.id, prefix)
 
             await ctx.cache.set(f'config/user/{ctx.author.id}/prefix', prefix)
 
+        await self.invalidate_prefix(ctx.author.id)
+
         log.info(f'User {ctx.author} ({ctx.author.id}) changed his/her custom prefix to "{prefix}".')
 
         if prefix == '':
@@ -129,6 +191,25 @@ class Config(commands.Cog, name='Configurações'):
 
         await ctx.reply(message)
 
+    @prefix.command(name='stats')
+    @checks.is_staffer()
+    async def prefix_stats(self, ctx: ErisContext):
+        '''
+        Mostra as estatísticas do cache de prefixos.
+        '''
+        prefixes = self.bot.prefixes
+        total = prefixes.hits + prefixes.misses
+        ratio = ctx.get_percentage(prefixes.hits, total) if total else 0
+
+        messages = [
+            f'**Em memória:** {len(prefixes)}/{prefixes.max_size}',
+            f'**Acertos:** {prefixes.hits}',
+            f'**Erros:** {prefixes.misses}',
+            f'**Taxa de acerto:** {ratio:.1f}%'
+        ]
+
+        await ctx.reply('\n'.join(messages))
+
 
 def setup(bot: Eris):
     bot.add_cog(Config(bot))
@@ -0,0 +1,155 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+from discord.ext import commands
+
+from eris import Eris
+from utils.context import ErisContext
+
+
+# Quantos listeners (ou comandos) são mostrados no `stats latency`.
+LATENCY_LIMIT = 10
+
+# Quantos callbacks lentos são mostrados no `stats loop`.
+SLOW_CALLBACK_LIMIT = 5
+
+LATENCY_KINDS = {
+    'listener': 'listener',
+    'listeners': 'listener',
+    'comando': 'command',
+    'comandos': 'command',
+    'command': 'command',
+    'commands': 'command'
+}
+
+
+class Diagnostics(commands.Cog, name='Diagnóstico'):
+    '''Comandos de diagnóstico do bot.'''
+
+    def __init__(self, bot: Eris):
+        self.bot = bot
+
+    def cog_check(self, ctx: ErisContext):
+        # Somente staffers usarão os comandos deste cog.
+        return ctx.bot.staff_role in ctx.author.roles
+
+    @commands.group(invoke_without_command=True)
+    async def stats(self, ctx: ErisContext):
+        '''
+        Comandos de estatísticas internas do bot.
+        '''
+        await ctx.send_help(self.stats)
+
+    @stats.command(name='messages', aliases=['mensagens'])
+    async def stats_messages(self, ctx: ErisContext):
+        '''
+        Mostra quantas mensagens foram descartadas antes de virar comando.
+        '''
+        stats = self.bot.message_stats
+
+        skipped = stats['skipped']
+        processed = stats['processed']
+        total = skipped + processed
+
+        ratio = ctx.get_percentage(skipped, total) if total else 0
+
+        messages = [
+            f'**Mensagens verificadas:** {total}',
+            f'**Descartadas antes do contexto:** {skipped} ({ratio:.1f}%)',
+            f'**Processadas como comando:** {processed}'
+        ]
+
+        await ctx.reply('\n'.join(messages))
+
+    @stats.command(name='latency', aliases=['latência'])
+    async def stats_latency(self, ctx: ErisContext, kind: str = 'listener'):
+        '''
+        Mostra a latência dos listeners (ou dos comandos) mais lentos.
+        '''
+        kind = LATENCY_KINDS.get(kind.lower())
+
+        if kind is None:
+            return await ctx.reply('Diga um tipo válido: `listeners` ou `comandos`.')
+
+        stats = self.bot.metrics.of_kind(kind)[:LATENCY_LIMIT]
+
+        if not stats:
+            return await ctx.reply('Não há nada por aqui.')
+
+        lines = []
+
+        for name, stat in stats:
+            p50, p95 = stat.quantile(0.5) * 1000, stat.quantile(0.95) * 1000
+
+            lines.append(
+                f'**{name}**: {stat.count}x, p50 ≤ {p50:.0f}ms, p95 ≤ {p95:.0f}ms, '
+                f'máx. {stat.max * 1000:.0f}ms, {stat.errors} erros, {stat.in_flight} rodando'
+            )
+
+        await ctx.reply('\n'.join(lines))
+
+    @stats.command(name='loop')
+    async def stats_loop(self, ctx: ErisContext):
+        '''
+        Mostra o atraso do event loop e os callbacks mais lentos.
+        '''
+        monitor = self.bot.loop_monitor
+        lags = monitor.lags
+
+        if not lags:
+            return await ctx.reply('Não há nada por aqui.')
+
+        average = sum(lags) / len(lags)
+        interval = monitor.interval * len(lags)
+
+        messages = [
+            f'**Atraso atual:** {monitor.lag * 1000:.1f}ms',
+            f'**Atraso médio:** {average * 1000:.1f}ms (últimos {interval:.0f}s)',
+            f'**Maior atraso:** {max(lags) * 1000:.1f}ms'
+        ]
+
+        slow = list(monitor.slow)[-SLOW_CALLBACK_LIMIT:]
+
+        if slow:
+            messages.append('\n**Callbacks lentos:**')
+
+        for callback in reversed(slow):
+            when = callback.when.strftime('%H:%M:%S')
+            where = f' ({callback.cog})' if callback.cog else ''
+
+            messages.append(f'`{when}` {callback.seconds * 1000:.0f}ms: `{callback.name}`{where}')
+
+        await ctx.reply('\n'.join(messages))
+
+
+def setup(bot: Eris):
+    bot.add_cog(Diagnostics(bot))
@@ -38,13 +38,18 @@ from discord import Member
 from discord.ext import commands
 
 from eris import Eris
+from utils import cache
 from utils import database
 from utils import checks
+from utils import cooldowns
 from utils.context import ErisContext
 
 
 COIN_EMOJI = '<:Ten:820727174424166530>'
 
+# Versão do formato das keys de economia no cache.
+CACHE_VERSION = 1
+
 
 class Currency(database.Table):
     user_id = database.Column(database.Integer(big=True), primary_key=True)
@@ -60,14 +65,17 @@ class Economy(commands.Cog, name='Economia'):
     @commands.Cog.listener()
     async def on_bot_load(self):
         # Carrega os dados dos usuários no cache.
-        sql = 'SELECT user_id, coins FROM currency;'
-        fetch = await self.bot.pool.fetch(sql)
+        def load(pipe, records):
+            pairs = []
 
-        for record in fetch:
-            user_id = record['user_id']
-            coins = record['coins']
+            for record in records:
+                pairs.extend((f'economy/user/{record["user_id"]}/coins', record['coins']))
 
-            await self.bot.cache.set(f'economy/user/{user_id}/coins', coins)
+            pipe.mset(*pairs)
+
+        sql = 'SELECT user_id, coins FROM currency;'
+        await cache.sync_namespace(self.bot.pool, self.bot.cache, sql, load, name='economy',
+                                   version=CACHE_VERSION, pattern='economy/user/*', warm=self.bot.warm_restart)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
@@ -132,7 +140,7 @@ class Economy(commands.Cog, name='Economia'):
         await self.bot.cache.set(f'economy/user/{user_id}/coins', coins)
 
     @commands.command()
-    @commands.cooldown(1, 86400, commands.BucketType.member)
+    @cooldowns.cooldown(1, 86400, commands.BucketType.member)
     @commands.before_invoke(insert_user)
     async def daily(self, ctx: ErisContext, *, member: Member = None):
         '''
@@ -34,7 +34,6 @@ import datetime
 import traceback
 import re
 
-import humanize
 import discord
 from discord.ext import commands
 from discord.ext.commands.errors import *
@@ -43,6 +42,7 @@ from asyncpg import Record
 from eris import Eris
 from utils import database
 from utils import checks
+from utils import human
 from utils.menus import ErisMenuPages
 from utils.context import ErisContext
 
@@ -201,7 +201,7 @@ class Errors(commands.Cog):
             return await ctx.reply('Você não tem permissão para usar este comando.')
 
         elif isinstance(error, CommandOnCooldown):
-            delta = humanize.precisedelta(error.retry_after, format='%0.0f')
+            delta = human.precisedelta(error.retry_after, format='%0.0f')
             return await ctx.reply(f'Espere **{delta}** antes de usar este comando novamente.')
 
         # Caso não passe por nenhum dos erros acima, então
@@ -222,7 +222,7 @@ class Errors(commands.Cog):
         '''
         Vê o status de um ticket de erro.
         '''
-        delta = humanize.precisedelta(ctx.message.created_at - ticket.created_at, format='%0.0f')
+        delta = human.precisedelta(ctx.message.created_at - ticket.created_at, format='%0.0f')
         is_solved = ctx.tick(ticket.is_solved)
 
         messages = [
@@ -273,7 +273,7 @@ class Errors(commands.Cog):
             ticket_id = record['id']
             created_at = record['created']
 
-            delta = humanize.precisedelta(ctx.message.created_at - created_at, format='%0.0f')
+            delta = human.precisedelta(ctx.message.created_at - created_at, format='%0.0f')
             entries.append(f'`[#{ticket_id}]` **Há {delta}**\n```py\n{error}```')
 
         menu = ErisMenuPages(entries)
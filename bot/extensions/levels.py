@@ -31,23 +31,30 @@ http://mozilla.org/MPL/2.0/.
 '''
 
 import random
+import asyncio
 import logging
-from typing import Optional
+import datetime
+from collections import defaultdict
+from typing import AsyncIterator, Optional
 
 import discord
 from discord import Member
-from discord.ext import commands
-from discord.ext.commands import CooldownMapping, BucketType
+from discord.ext import commands, tasks
+from discord.ext.commands import BucketType
 
 from eris import Eris
 from utils import database
+from utils import cache
 from utils import checks
+from utils import cooldowns
+from utils import experience
 from utils.context import ErisContext
 from utils.human import suffix_number
-from utils.menus import ErisMenuPages, SourceType
+from utils.menus import MenuPagesBase, AsyncFieldPageSource
 
 
 log = logging.getLogger(__name__)
+grant_log = logging.getLogger(f'{__name__}.grants')
 
 
 GENERAL_CHANNEL_ID   = 810910658458550303
@@ -67,56 +74,271 @@ LEVEL_ROLES = (
     799367386695991407
 )
 
+# Sorted set com a experiência de todos os usuários,
+# onde o membro é o ID do usuário e o score é a exp.
+RANKING_KEY = 'levels/ranking'
+
+# Versão do formato do ranking no cache. Deve ser
+# incrementada sempre que o formato mudar.
+CACHE_VERSION = 2
+
+# De quanto em quanto tempo (em segundos) a experiência
+# acumulada em memória é salva no banco de dados.
+FLUSH_INTERVAL = 5
+
+# Nível a partir do qual o usuário não recebe mais experiência.
+MAX_LEVEL = 100
+
+# Quantos membros são verificados por vez pela reconciliação
+# de cargos e quanto tempo (em segundos) esperar entre cada
+# alteração, para não estourar o rate limit da API.
+RECONCILE_CHUNK_SIZE = 100
+RECONCILE_DELAY = 1
+
+# Rankings por período. As keys expiram um tempo depois do fim
+# do período, o suficiente para serem arquivadas no banco de dados.
+PERIODS = ('weekly', 'monthly')
+PERIOD_GRACE = datetime.timedelta(days=7)
+
+PERIOD_ALIASES = {
+    'semanal': 'weekly',
+    'semana': 'weekly',
+    'weekly': 'weekly',
+    'mensal': 'monthly',
+    'mês': 'monthly',
+    'mes': 'monthly',
+    'monthly': 'monthly'
+}
+
+# Inicializa o usuário, adiciona a experiência e retorna a experiência
+# antiga e a nova em uma única ida ao Redis. Caso o usuário já tenha
+# chegado no limite, nada é alterado e os dois valores são iguais.
+#
+# A mesma experiência também é somada nos rankings por período.
+#
+# KEYS[1]: o sorted set do ranking.
+# KEYS[2..n]: os sorted sets dos períodos atuais.
+# ARGV[1]: o ID do usuário.
+# ARGV[2]: a experiência a ser adicionada.
+# ARGV[3]: a experiência máxima para receber exp.
+# ARGV[4..n+2]: o timestamp de expiração de cada período.
+GRANT_EXPERIENCE = cache.Script('''
+    local old = tonumber(redis.call('ZSCORE', KEYS[1], ARGV[1]) or 0)
+
+    if old >= tonumber(ARGV[3]) then
+        return {old, old}
+    end
+
+    local new = tonumber(redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1]))
+
+    for i = 2, #KEYS do
+        redis.call('ZINCRBY', KEYS[i], ARGV[2], ARGV[1])
+        redis.call('EXPIREAT', KEYS[i], ARGV[i + 2])
+    end
+
+    return {old, new}
+''')
+
+
+def get_period(period: str, now: datetime.datetime) -> tuple[str, datetime.datetime, datetime.datetime]:
+    '''Retorna a key e os limites do período que contém `now`.
+
+    Parameters
+    ----------
+    period: :class:`str`
+        O tipo do período, `weekly` ou `monthly`.
+    now: :class:`datetime.datetime`
+        Um momento (em UTC) dentro do período.
+
+    Returns
+    -------
+    tuple[:class:`str`, :class:`datetime.datetime`, :class:`datetime.datetime`]
+        A key do sorted set, o início e o fim do período.
+    '''
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if period == 'weekly':
+        year, week, weekday = now.isocalendar()
+        start = midnight - datetime.timedelta(days=weekday - 1)
+        end = start + datetime.timedelta(days=7)
+        name = f'{year}-W{week:02}'
+    else:
+        start = midnight.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        name = f'{start:%Y-%m}'
+
+    return f'{RANKING_KEY}/{period}/{name}', start, end
+
 
 class Levels(database.Table):
     user_id = database.Column(database.Integer(big=True), primary_key=True)
     exp = database.Column(database.Integer, default=0)
 
 
+class LevelsArchive(database.Table, table_name='levels_archive'):
+    period = database.Column(database.String, primary_key=True)
+    user_id = database.Column(database.Integer(big=True), primary_key=True)
+    exp = database.Column(database.Integer)
+    position = database.Column(database.Integer)
+
+
+class RankingPageSource(AsyncFieldPageSource):
+    '''Páginas do ranking buscadas sob demanda no sorted set.'''
+
+    def __init__(self, ctx: ErisContext, key: str, *, per_page: int = 6):
+        super().__init__(per_page=per_page)
+        self.ctx = ctx
+        self.key = key
+
+    async def get_count(self) -> int:
+        return await self.ctx.cache.zcard(self.key)
+
+    async def get_entries(self, offset: int, limit: int) -> list[dict[str, str]]:
+        stop = offset + limit - 1
+        users = await self.ctx.cache.zrevrange(self.key, offset, stop, withscores=True)
+
+        # Os membros que não estão no cache são buscados ao mesmo tempo.
+        members = await asyncio.gather(*(self.ctx.bot.get_or_fetch_member(int(user_id)) for user_id, _ in users))
+
+        entries = []
+
+        for i, ((user_id, exp), member) in enumerate(zip(users, members), start=offset + 1):
+            name = member.display_name if member else user_id
+
+            exp = int(exp)
+            level = experience.get_level_from_exp(exp)
+
+            value = f'Experiência: **{suffix_number(exp)}**\nNível: **{level}**'
+            entries.append({'name': f'{i}. {name}', 'value': value})
+
+        return entries
+
+
 class Ranking(commands.Cog):
     '''Comandos relacionados ao sistema de níveis.'''
 
     def __init__(self, bot: Eris):
         self.bot = bot
-        self.cooldown = CooldownMapping.from_cooldown(1, 60, BucketType.member)
+        # O cooldown fica no Redis para ser compartilhado entre processos.
+        self.cooldown = cooldowns.RedisCooldownMapping(1, 60, BucketType.member, name='levels/exp')
+
+        # Experiência ainda não salva no banco de dados, por usuário.
+        # O cache é atualizado na hora, o PostgreSQL em lotes.
+        self._pending_exp = defaultdict(int)
+        self._flush_lock = asyncio.Lock()
+
+        # Só é marcado quando o ranking foi carregado no cache,
+        # antes disso os cargos de nível não podem ser corrigidos.
+        self._ranking_loaded = asyncio.Event()
+
+        self.flush_experience.start()
+        self.archive_periods.start()
+
+        self._reconcile_task = None
+
+    def cog_unload(self):
+        # O `after_loop` salva o que estiver pendente.
+        self.flush_experience.cancel()
+        self.archive_periods.cancel()
+
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+
+    async def cog_close(self):
+        await self.flush_pending_experience()
+
+    # Os cálculos de nível usam uma tabela pré-calculada, já que
+    # eles rodam a cada mensagem e para cada entrada do ranking.
+    get_level_exp = staticmethod(experience.get_level_exp)
+    get_total_exp = staticmethod(experience.get_total_exp)
+    get_level_from_exp = staticmethod(experience.get_level_from_exp)
+    get_level_progress = staticmethod(experience.get_level_progress)
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_experience(self):
+        try:
+            await self.flush_pending_experience()
+        except Exception:
+            log.exception('Could not flush pending experience.')
+
+    @flush_experience.after_loop
+    async def after_flush_experience(self):
+        await self.flush_pending_experience()
+
+    @tasks.loop(minutes=10)
+    async def archive_periods(self):
+        now = datetime.datetime.utcnow()
+
+        for period in PERIODS:
+            # O período anterior é o que contém o último
+            # segundo antes do início do período atual.
+            _, start, _ = get_period(period, now)
+            key, _, _ = get_period(period, start - datetime.timedelta(seconds=1))
+
+            try:
+                await self.archive_period(key)
+            except Exception:
+                log.exception(f"Could not archive ranking '{key}'.")
+
+    async def archive_period(self, key: str):
+        '''Salva um ranking de período no banco de dados com um único insert.
+        Somente um processo arquiva cada período.
 
-    @staticmethod
-    def get_level_exp(level: int) -> int:
-        return 5 * (level ** 2) + 50 * level + 100
+        Parameters
+        ----------
+        key: :class:`str`
+            A key do sorted set do período.
+        '''
+        cache = self.bot.cache
 
-    @staticmethod
-    def get_total_exp(level: int) -> int:
-        total_exp = 0
+        if not await cache.exists(key):
+            return
 
-        for i in range(level):
-            total_exp += Ranking.get_level_exp(i)
+        marker = f'levels/archived/{key}'
+        expire = int(PERIOD_GRACE.total_seconds()) * 2
+
+        if not await cache.set(marker, 1, expire=expire, exist=cache.SET_IF_NOT_EXIST):
+            return
 
-        return total_exp
+        users = await cache.zrevrange(key, 0, -1, withscores=True)
 
-    @staticmethod
-    def get_level_from_exp(exp: int) -> int:
-        level = 0
+        user_ids = [int(user_id) for user_id, _ in users]
+        exps = [int(exp) for _, exp in users]
+        positions = list(range(1, len(users) + 1))
+
+        sql = '''
+            INSERT INTO levels_archive (period, user_id, exp, position)
+            SELECT $1, * FROM unnest($2::bigint[], $3::integer[], $4::integer[])
+            ON CONFLICT (period, user_id)
+            DO NOTHING;
+        '''
+        period = key[len(RANKING_KEY) + 1:]
 
-        while exp >= Ranking.get_level_exp(level):
-            exp -= Ranking.get_level_exp(level)
-            level += 1
+        try:
+            await self.bot.pool.execute(sql, period, user_ids, exps, positions)
+        except Exception:
+            # Deixamos outra tentativa arquivar o período.
+            await cache.delete(marker)
+            raise
 
-        return level
+        log.info(f"Archived ranking '{period}' with {len(users)} users.")
 
     @commands.Cog.listener()
     async def on_bot_load(self):
         # Carrega os dados dos usuários no cache.
-        sql = 'SELECT user_id, exp FROM levels;'
-        fetch = await self.bot.pool.fetch(sql)
+        # O sorted set já mantém o ranking ordenado.
+        def load(pipe, records):
+            pairs = [value for record in records for value in (record['exp'], record['user_id'])]
+            pipe.zadd(RANKING_KEY, *pairs)
 
-        for record in fetch:
-            user_id = record['user_id']
-            exp = record['exp']
+        # `levels/users` e `levels/user/*/exp` são do formato antigo do
+        # cache, de quando ele era apagado inteiro a cada inicialização.
+        sql = 'SELECT user_id, exp FROM levels;'
+        await cache.sync_namespace(self.bot.pool, self.bot.cache, sql, load, name='levels',
+                                   version=CACHE_VERSION, pattern=RANKING_KEY, warm=self.bot.warm_restart,
+                                   legacy_patterns=('levels/users', 'levels/user/*/exp'))
 
-            # Adiciona o usuário na lista de usuários assim
-            # podemos ordenar na hora de mostrar o ranking.
-            await self.bot.cache.sadd('levels/users', user_id)
-            await self.bot.cache.set(f'levels/user/{user_id}/exp', exp)
+        self._ranking_loaded.set()
 
     @commands.Cog.listener()
     async def on_first_launch(self):
@@ -126,44 +348,56 @@ class Ranking(commands.Cog):
         for i, role_id in enumerate(LEVEL_ROLES, start=1):
             self.roles[i * 10] = self.bot.cosmic.get_role(role_id)
 
+        # Corrige os cargos de quem subiu (ou desceu) de
+        # nível enquanto o bot estava desligado.
+        self._reconcile_task = self.bot.loop.create_task(self.reconcile_rewards())
+
     @commands.Cog.listener()
     async def on_member_remove(self, member: Member):
         # Caso alguém saia do servidor, removemos
         # ela do banco de dados e do cache.
-        sql = 'DELETE FROM levels WHERE user_id = $1;'
-        await self.bot.pool.execute(sql, member.id)
+        async with self._flush_lock:
+            self._pending_exp.pop(member.id, None)
+
+            sql = 'DELETE FROM levels WHERE user_id = $1;'
+            await self.bot.pool.execute(sql, member.id)
 
-        await self.bot.cache.delete(f'levels/user/{member.id}/exp')
-        await self.bot.cache.srem('level/users', member.id)
+        now = datetime.datetime.utcnow()
+        keys = [get_period(period, now)[0] for period in PERIODS]
+
+        for key in (RANKING_KEY, *keys):
+            await self.bot.cache.zrem(key, member.id)
 
     @commands.Cog.listener()
     async def on_regular_message(self, message: discord.Message):
+        # Enquanto o ranking é carregado, a experiência dada seria
+        # sobrescrita pelo valor do banco de dados.
+        if not self._ranking_loaded.is_set():
+            return
+
         if not self.can_receive_exp(message.channel.id):
             return
 
         author = message.author
 
-        bucket = self.cooldown.get_bucket(message)
-        retry_after = bucket.update_rate_limit()
+        retry_after = await self.cooldown.update_rate_limit(self.bot.cache, message)
 
         if retry_after:
             return
 
-        exp = await self.get_user_experience(author.id)
-        level = self.get_level_from_exp(exp)
+        to_add = random.randint(15, 25)
+        exp, new_exp = await self.grant_experience(author.id, to_add)
 
-        # Se o usuário for nível 100 então não iremos dar exp.
-        if level >= 100:
+        # Se o usuário for nível 100 então ele não recebeu exp.
+        if exp == new_exp:
             return
 
-        to_add = random.randint(15, 25)
-        await self.add_experience(author.id, to_add)
-
-        new_exp = await self.get_user_experience(author.id)
+        level = self.get_level_from_exp(exp)
         new_level = self.get_level_from_exp(new_exp)
 
-        fmt = 'User {0} ({0.id}) received {1} exp. ({2} -> {3})'
-        log.info(fmt.format(author, to_add, exp, new_exp))
+        # Este log acontece a cada mensagem, então ele tem um logger
+        # próprio (que é amostrado) e só é formatado se for escrito.
+        grant_log.info('User %s (%s) received %s exp. (%s -> %s)', author, author.id, to_add, exp, new_exp)
 
         # Se ao receber exp. o nível do usuário mudou,
         # significa que ele subiu de nível.
@@ -173,7 +407,7 @@ class Ranking(commands.Cog):
             fmt = 'User {0} ({0.id}) leveled up ({1} -> {2})'
             log.info(fmt.format(author, level, new_level))
 
-            reward = await self.update_rewards(author)
+            reward = await self.update_rewards(author, new_level)
 
             if reward:
                 messages.append(f'Ao subir para este nível você recebeu {reward}.')
@@ -215,8 +449,8 @@ class Ranking(commands.Cog):
         '''
         await self.bot.pool.execute(sql, user_id)
 
-        await self.bot.cache.sadd('levels/users', user_id)
-        await self.bot.cache.setnx(f'levels/user/{user_id}/exp', 0)
+        cache = self.bot.cache
+        await cache.zadd(RANKING_KEY, 0, user_id, exist=cache.ZSET_IF_NOT_EXIST)
 
     async def get_user_experience(self, user_id: int) -> int:
         '''Mostra a quantidade de experiência que um usuário tem.
@@ -232,21 +466,35 @@ class Ranking(commands.Cog):
         :class:`int`
             A quantidade de experiência que o usuário possui.
         '''        
-        exp = await self.bot.cache.get(f'levels/user/{user_id}/exp')
+        exp = await self.bot.cache.zscore(RANKING_KEY, user_id)
 
         # Caso o usuário não esteja no cache, então admitimos
         # que ele também não esteja no banco de dados. Podemos
         # retornar zero.
-        if not exp:
+        if exp is None:
             return 0
 
         return int(exp)
 
     async def add_experience(self, user_id: int, exp: int):
         '''Adiciona uma quantidade de experiência em um usuário.
-        Caso o usuário não esteja no cache então ele é inserido
-        tanto no cache quanto no banco de dados.
+        O cache é atualizado na hora e o banco de dados no
+        próximo `flush_pending_experience`.
 
+        Parameters
+        ----------
+        user_id: :class:`int`
+            O ID do usuário.
+        exp: :class:`int`
+            A quantidade de experiência a ser dada.
+        '''
+        self._pending_exp[user_id] += exp
+        await self.bot.cache.zincrby(RANKING_KEY, exp, user_id)
+
+    async def grant_experience(self, user_id: int, exp: int) -> tuple[int, int]:
+        '''Dá experiência para um usuário por mensagem enviada.
+        Diferente de `add_experience`, usuários no nível máximo
+        não recebem experiência.
 
         Parameters
         ----------
@@ -254,18 +502,35 @@ class Ranking(commands.Cog):
             O ID do usuário.
         exp: :class:`int`
             A quantidade de experiência a ser dada.
+
+        Returns
+        -------
+        tuple[:class:`int`, :class:`int`]
+            A experiência antes e depois de ser dada.
         '''
-        await self.insert_user(user_id)
+        keys = [RANKING_KEY]
+        args = [user_id, exp, self.get_total_exp(MAX_LEVEL)]
+
+        now = datetime.datetime.utcnow()
+
+        for period in PERIODS:
+            key, _, end = get_period(period, now)
+            expires = end.replace(tzinfo=datetime.timezone.utc) + PERIOD_GRACE
+
+            keys.append(key)
+            args.append(int(expires.timestamp()))
+
+        old, new = await GRANT_EXPERIENCE(self.bot.cache, keys, args)
 
-        sql = 'UPDATE levels SET exp = exp + $2 WHERE user_id = $1;'
-        await self.bot.pool.execute(sql, user_id, exp)
+        if new != old:
+            self._pending_exp[user_id] += new - old
 
-        await self.bot.cache.incrby(f'levels/user/{user_id}/exp', exp)
+        return old, new
 
     async def remove_experience(self, user_id: int, exp: int):
         '''Remove uma quantidade de experiência em um usuário.
-        Caso o usuário não esteja no cache então ele é inserido
-        tanto no cache quanto no banco de dados.
+        O cache é atualizado na hora e o banco de dados no
+        próximo `flush_pending_experience`.
 
         Parameters
         ----------
@@ -274,12 +539,8 @@ class Ranking(commands.Cog):
         exp: :class:`int`
             A quantidade de experiência a ser removida.
         '''
-        await self.insert_user(user_id)
-
-        sql = 'UPDATE levels SET exp = exp - $2 WHERE user_id = $1;'
-        await self.bot.pool.execute(sql, user_id, exp)
-
-        await self.bot.cache.decrby(f'levels/user/{user_id}/exp', exp)
+        self._pending_exp[user_id] -= exp
+        await self.bot.cache.zincrby(RANKING_KEY, -exp, user_id)
 
     async def set_experience(self, user_id: int, exp: int):
         '''Define uma quantidade de experiência em um usuário.
@@ -295,58 +556,220 @@ class Ranking(commands.Cog):
         '''
         await self.insert_user(user_id)
 
-        sql = 'UPDATE levels SET exp = $2 WHERE user_id = $1;'
-        await self.bot.pool.execute(sql, user_id, exp)
+        async with self._flush_lock:
+            # O valor definido sobrescreve qualquer alteração pendente.
+            self._pending_exp.pop(user_id, None)
+
+            sql = 'UPDATE levels SET exp = $2 WHERE user_id = $1;'
+            await self.bot.pool.execute(sql, user_id, exp)
+
+        await self.bot.cache.zadd(RANKING_KEY, exp, user_id)
+
+    async def flush_pending_experience(self):
+        '''Salva a experiência pendente no banco de dados
+        usando um único upsert para todos os usuários.
+        '''
+        async with self._flush_lock:
+            if not self._pending_exp:
+                return
+
+            pending, self._pending_exp = self._pending_exp, defaultdict(int)
+
+            sql = '''
+                INSERT INTO levels (user_id, exp)
+                SELECT * FROM unnest($1::bigint[], $2::integer[])
+                ON CONFLICT (user_id)
+                DO UPDATE SET exp = levels.exp + excluded.exp;
+            '''
+
+            try:
+                await self.bot.pool.execute(sql, list(pending.keys()), list(pending.values()))
+            except Exception:
+                # Devolvemos a experiência para a fila, assim
+                # ela é salva na próxima tentativa.
+                for user_id, exp in pending.items():
+                    self._pending_exp[user_id] += exp
+                raise
+
+        log.info(f'Flushed pending experience of {len(pending)} users.')
+
+    def get_reward_roles(self, member: Member, level: int) -> list[discord.Role]:
+        '''Retorna os cargos que um membro deve ter para o seu nível.
+        Somente o cargo do maior nível alcançado é mantido.
 
-        await self.bot.cache.set(f'levels/user/{user_id}/exp', exp)
+        Parameters
+        ----------
+        member: :class:`discord.Member`
+            O membro a ser verificado.
+        level: :class:`int`
+            O nível do membro.
 
-    async def update_rewards(self, member: Member):
+        Returns
+        -------
+        list[:class:`discord.Role`]
+            Os cargos do membro, sem contar o `@everyone`.
+        '''
+        level_roles = set(self.roles.values())
+        roles = [role for role in member.roles[1:] if role not in level_roles]
+
+        reward = self.roles.get(min(level, MAX_LEVEL) // 10 * 10)
+
+        if reward:
+            roles.append(reward)
+
+        return roles
+
+    async def update_rewards(self, member: Member, level: int = None) -> Optional[str]:
         '''Atualiza os cargos de recompensa.
+        A API só é chamada caso os cargos tenham mudado.
 
         Parameters
         ----------
         member: :class:`discord.Member`
             O usuário a ser recompensado.
-        '''
-        exp = await self.get_user_experience(member.id)
-        level = self.get_level_from_exp(exp)
+        level: Optional[:class:`int`]
+            O nível do usuário. Caso não seja passado,
+            ele é calculado pela experiência no cache.
 
-        roles = self.roles.values()
-        await member.remove_roles(*roles, reason='Removendo cargo de níveis anteriores')
+        Returns
+        -------
+        Optional[:class:`str`]
+            A menção do cargo recebido, caso algum tenha sido dado.
+        '''
+        if level is None:
+            exp = await self.get_user_experience(member.id)
+            level = self.get_level_from_exp(exp)
 
-        role = self.roles.get(level)
+        roles = self.get_reward_roles(member, level)
 
-        if not role:
+        if set(roles) == set(member.roles[1:]):
             return None
 
-        await member.add_roles(role, reason=f'Usuário subiu para o nível {level}')
-        return role.mention
+        # Calculado antes da edição, já que o membro em cache pode ser
+        # atualizado pelo gateway antes da requisição terminar.
+        new_roles = set(roles) - set(member.roles)
 
-    @commands.command(aliases=['ranking', 'top'], ignore_extra=False)
-    async def rank(self, ctx: ErisContext):
+        await member.edit(roles=roles, reason=f'Atualizando cargo do nível {level}')
+
+        return ', '.join(role.mention for role in new_roles) or None
+
+    async def reconcile_rewards(self):
+        '''Corrige os cargos de nível de todos os membros do servidor.
+        Os membros são verificados em lotes e somente quem está com
+        os cargos errados é alterado, uma requisição por vez.
         '''
-        Mostra o ranking do servidor.
+        # Sem o ranking no cache todos pareceriam nível 0 e
+        # perderiam seus cargos, então esperamos o carregamento.
+        await self.bot.wait_until_warm()
+
+        if not self._ranking_loaded.is_set():
+            log.warning('Ranking was not loaded, skipping level roles reconciliation.')
+            return
+
+        total = changed = 0
+
+        async for chunk in self.iter_member_chunks():
+            total += len(chunk)
+
+            pipe = self.bot.cache.pipeline()
+            scores = [pipe.zscore(RANKING_KEY, member.id) for member in chunk]
+            await pipe.execute()
+
+            for member, score in zip(chunk, scores):
+                score = await score
+
+                # Sem pontuação não sabemos o nível do
+                # membro, então os cargos dele ficam como estão.
+                if score is None:
+                    continue
+
+                level = self.get_level_from_exp(int(score))
+                roles = self.get_reward_roles(member, level)
+
+                if set(roles) == set(member.roles[1:]):
+                    continue
+
+                try:
+                    # No modo econômico o lote pode ter sido buscado há um
+                    # bom tempo, e a edição escreve a lista inteira de cargos.
+                    # Buscamos o membro de novo para não desfazer mudanças
+                    # feitas nesse meio tempo.
+                    if self.bot.lean:
+                        member = await self.bot.cosmic.fetch_member(member.id)
+                        roles = self.get_reward_roles(member, level)
+
+                        if set(roles) == set(member.roles[1:]):
+                            continue
+
+                    await member.edit(roles=roles, reason=f'Corrigindo cargo do nível {level}')
+                except discord.NotFound:
+                    continue
+                except discord.HTTPException:
+                    log.exception(f'Could not reconcile level roles of {member} ({member.id}).')
+                else:
+                    changed += 1
+
+                await asyncio.sleep(RECONCILE_DELAY)
+
+        log.info(f'Reconciled level roles of {changed} out of {total} members.')
+
+    async def iter_member_chunks(self) -> AsyncIterator[list[discord.Member]]:
+        '''Percorre os membros do servidor (sem bots) em lotes. No modo
+        econômico os membros não estão no cache, então eles são
+        buscados via HTTP aos poucos.
+
+        Yields
+        ------
+        list[:class:`discord.Member`]
+            Um lote de membros.
         '''
+        if not self.bot.lean:
+            members = [member for member in self.bot.cosmic.members if not member.bot]
 
-        # Usamos a key `levels/users` para ordenar o padrão `levels/user/<id>/exp`.
-        users = await ctx.cache.sort('levels/users', by='levels/user/*/exp', asc=False)
+            for i in range(0, len(members), RECONCILE_CHUNK_SIZE):
+                yield members[i:i + RECONCILE_CHUNK_SIZE]
 
-        if not users:
-            return await ctx.reply('Não há nada por aqui.')
+            return
 
-        entries = []
+        chunk = []
 
-        for i, user_id in enumerate(users, start=1):
-            member = ctx.guild.get_member(int(user_id))
+        async for member in self.bot.cosmic.fetch_members(limit=None):
+            if member.bot:
+                continue
 
-            exp = int(await ctx.cache.get(f'levels/user/{user_id}/exp'))
-            level = self.get_level_from_exp(exp)
+            chunk.append(member)
 
-            value = f'Experiência: **{suffix_number(exp)}**\nNível: **{level}**'
-            field = {'name': f'{i}. {member.display_name}', 'value': value}
-            entries.append(field)
+            if len(chunk) == RECONCILE_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    @commands.command(aliases=['ranking', 'top'], ignore_extra=False)
+    async def rank(self, ctx: ErisContext, period: str = None):
+        '''
+        Mostra o ranking do servidor (ou o ranking semanal/mensal).
+        '''
+        key = RANKING_KEY
 
-        menu = ErisMenuPages(entries, source=SourceType.FIELD, per_page=6)
+        if period is not None:
+            period = PERIOD_ALIASES.get(period.lower())
+
+            if period is None:
+                return await ctx.reply('Diga um período válido: `semanal` ou `mensal`.')
+
+            key, _, _ = get_period(period, datetime.datetime.utcnow())
+
+        # Cada página é buscada somente quando for mostrada,
+        # então o custo não depende do tamanho do ranking.
+        source = RankingPageSource(ctx, key)
+        await source.prepare()
+
+        if not source.get_max_pages():
+            return await ctx.reply('Não há nada por aqui.')
+
+        menu = MenuPagesBase(source, clear_reactions_after=True)
         await menu.start(ctx)
 
     @commands.group(invoke_without_command=True)
@@ -358,11 +781,8 @@ class Ranking(commands.Cog):
 
         await self.insert_user(member.id)
 
-        exp = int(await ctx.cache.get(f'levels/user/{member.id}/exp'))
-        level = self.get_level_from_exp(exp)
-
-        diff_exp = exp - self.get_total_exp(level)
-        needed_exp = self.get_level_exp(level + 1)
+        exp = await self.get_user_experience(member.id)
+        level, diff_exp, needed_exp = self.get_level_progress(exp)
 
         percentage = ctx.get_percentage(diff_exp, needed_exp)
         bar = ctx.progress_bar(percentage)
@@ -372,6 +792,44 @@ class Ranking(commands.Cog):
 
         await ctx.reply(content, title=title)
 
+    @exp.command(name='position', aliases=['pos', 'posição'])
+    async def exp_position(self, ctx: ErisContext, *, member: discord.Member = None):
+        '''
+        Mostra a posição de um usuário no ranking.
+        '''
+        member = member or ctx.author
+
+        pipe = ctx.cache.pipeline()
+        rank = pipe.zrevrank(RANKING_KEY, member.id)
+        count = pipe.zcard(RANKING_KEY)
+        await pipe.execute()
+
+        rank, count = await rank, await count
+
+        if rank is None:
+            return await ctx.reply(f'{member.mention} ainda não está no ranking.')
+
+        # Pegamos quem está logo acima e logo abaixo do usuário.
+        start = max(rank - 1, 0)
+        users = await ctx.cache.zrevrange(RANKING_KEY, start, rank + 1, withscores=True)
+
+        neighbours = await asyncio.gather(*(ctx.bot.get_or_fetch_member(int(user_id)) for user_id, _ in users))
+
+        lines = []
+
+        for i, ((user_id, exp), neighbour) in enumerate(zip(users, neighbours), start=start + 1):
+            name = neighbour.display_name if neighbour else user_id
+
+            line = f'`{i}.` {name} - {suffix_number(int(exp))} exp.'
+            lines.append(f'**{line}**' if int(user_id) == member.id else line)
+
+        percentile = ctx.get_percentage(rank + 1, count)
+
+        title = f'Posição de {member.display_name}'
+        content = f'Posição: **{rank + 1}** de {count} (top **{percentile:.1f}%**)\n\n' + '\n'.join(lines)
+
+        await ctx.reply(content, title=title)
+
     @exp.command(name='add')
     @checks.is_staffer()
     async def exp_add(self, ctx: ErisContext, member: Optional[Member] = None, exp: int = None):
@@ -30,20 +30,56 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+import json
+import time
+import uuid
+import heapq
 import asyncio
+import logging
 import typing
 import datetime
 
 import discord
 import asyncpg
-import humanize
 from discord.ext import commands
 
+import config
 from eris import Eris
 from utils import database
+from utils import human
 from utils.context import ErisContext
 from utils.time import UserFriendlyTime
-from utils.menus import ErisMenuPages, SourceType
+from utils.menus import MenuPagesBase, AsyncFieldPageSource
+from utils.wheel import TimingWheel
+
+
+log = logging.getLogger(__name__)
+
+
+# Somente timers que expiram dentro desta janela ficam em memória,
+# e eles são carregados do banco de dados em lotes deste tamanho.
+TIMER_WINDOW     = datetime.timedelta(days=40)
+TIMER_BATCH_SIZE = 1000
+
+# Quantos lembretes podem ser enviados ao mesmo tempo quando
+# muitos timers expiram juntos.
+REMINDER_CONCURRENCY = 10
+
+# Canal do PostgreSQL usado para avisar os outros processos
+# que um timer novo foi criado, quando `shared_timers = True`.
+TIMER_CHANNEL = 'reminders'
+
+# Timers que expiram em até um minuto não vão para o banco de dados.
+# Eles ficam neste sorted set do Redis (com o timestamp de quando
+# expiram como score) e em uma roda de tempo em memória.
+SHORT_TIMER_KEY     = 'reminders/short'
+SHORT_TIMER_MAX     = 60
+SHORT_TIMER_TICK    = 1.0
+SHORT_TIMER_SLOTS   = 64
+
+# A cada volta da roda procuramos timers curtos atrasados há mais
+# que isso, por exemplo os de outro processo que foi desligado.
+SHORT_TIMER_GRACE = 5
 
 
 class Reminders(database.Table):
@@ -54,6 +90,86 @@ class Reminders(database.Table):
     event = database.Column(database.String)
     extra = database.Column(database.Json, default="'{}'::jsonb")
 
+    # Dono, canal e conteúdo dos lembretes, usados nas listagens
+    # sem precisar ler o `extra`. Outros eventos deixam nulo.
+    owner_id = database.Column(database.Integer(big=True), nullable=True)
+    channel_id = database.Column(database.Integer(big=True), nullable=True)
+    content = database.Column(database.String, nullable=True)
+
+    @classmethod
+    def create_table(cls, *, exists_ok: bool = True) -> str:
+        statement = super().create_table(exists_ok=exists_ok)
+
+        # Tabelas criadas antes dessas colunas existirem ganham
+        # as colunas e têm os lembretes preenchidos pelo `extra`.
+        sql = '''
+            ALTER TABLE reminders ADD COLUMN IF NOT EXISTS owner_id BIGINT;
+            ALTER TABLE reminders ADD COLUMN IF NOT EXISTS channel_id BIGINT;
+            ALTER TABLE reminders ADD COLUMN IF NOT EXISTS content TEXT;
+
+            UPDATE reminders SET
+                owner_id = (extra #>> '{args,0}')::bigint,
+                channel_id = (extra #>> '{args,1}')::bigint,
+                content = extra #>> '{args,2}'
+            WHERE event = 'reminder' AND owner_id IS NULL;
+
+            CREATE INDEX IF NOT EXISTS reminders_owner_idx ON reminders (event, owner_id, expires, id);
+        '''
+        return statement + '\n' + sql
+
+
+class ReminderPageSource(AsyncFieldPageSource):
+    '''Os lembretes de um usuário, uma página por vez. Cada página
+    continua de onde a anterior parou, então a busca é sempre
+    uma leitura do índice, não importa o tamanho da tabela.
+    '''
+    def __init__(self, ctx: ErisContext, owner_id: int, *, per_page: int = 10):
+        super().__init__(per_page=per_page)
+        self.ctx = ctx
+        self.owner_id = owner_id
+
+        # O (expires, id) do último lembrete antes de cada página.
+        self._cursors = {0: (datetime.datetime.min, 0)}
+
+    async def get_count(self) -> int:
+        sql = "SELECT COUNT(*) FROM reminders WHERE event = 'reminder' AND owner_id = $1;"
+        return await self.ctx.pool.fetchval(sql, self.owner_id)
+
+    async def get_entries(self, offset: int, limit: int) -> list[dict[str, str]]:
+        cursor = self._cursors.get(offset)
+
+        if cursor is not None:
+            sql = '''
+                SELECT id, expires, content FROM reminders
+                WHERE event = 'reminder' AND owner_id = $1
+                AND (expires, id) > ($2, $3)
+                ORDER BY expires, id
+                LIMIT $4;
+            '''
+            records = await self.ctx.pool.fetch(sql, self.owner_id, *cursor, limit)
+        else:
+            # Pulando direto para uma página que ainda não foi vista.
+            sql = '''
+                SELECT id, expires, content FROM reminders
+                WHERE event = 'reminder' AND owner_id = $1
+                ORDER BY expires, id
+                OFFSET $2 LIMIT $3;
+            '''
+            records = await self.ctx.pool.fetch(sql, self.owner_id, offset, limit)
+
+        if records:
+            last = records[-1]
+            self._cursors[offset + limit] = (last['expires'], last['id'])
+
+        now = datetime.datetime.utcnow().replace(microsecond=0)
+        entries = []
+
+        for reminder_id, expires, content in records:
+            delta = human.precisedelta(expires - now, format='%0.0f')
+            entries.append({'name': f'[{reminder_id}] Em {delta}', 'value': content, 'inline': False})
+
+        return entries
+
 
 class Timer:
     __slots__ = ('args', 'kwargs', 'event', 'id', 'created_at', 'expires')
@@ -81,6 +197,30 @@ class Timer:
 
         return cls(record=pseudo)
 
+    @classmethod
+    def from_json(cls, data: str):
+        data = json.loads(data)
+
+        expires = datetime.datetime.fromisoformat(data['expires'])
+        created = datetime.datetime.fromisoformat(data['created'])
+
+        return cls.temporary(expires=expires, created=created, event=data['event'],
+                             args=data['args'], kwargs=data['kwargs'])
+
+    def to_json(self) -> str:
+        # O token deixa cada timer único dentro do sorted set,
+        # mesmo que dois timers iguais sejam criados.
+        data = {
+            'token': uuid.uuid4().hex,
+            'event': self.event,
+            'args': self.args,
+            'kwargs': self.kwargs,
+            'created': self.created_at.isoformat(),
+            'expires': self.expires.isoformat()
+        }
+
+        return json.dumps(data)
+
     def __eq__(self, other: typing.Any):
         return isinstance(other, type(self)) and other.id == self.id
 
@@ -89,7 +229,7 @@ class Timer:
 
     @property
     def delta(self) -> str:
-        return humanize.precisedelta(self.created_at - self.expires, format='%0.0f')
+        return human.precisedelta(self.created_at - self.expires, format='%0.0f')
 
 
 class Reminder(commands.Cog, name='Lembretes'):
@@ -98,59 +238,306 @@ class Reminder(commands.Cog, name='Lembretes'):
     def __init__(self, bot: Eris):
         self.bot = bot
 
-        self._have_data = asyncio.Event(loop=bot.loop)
-        self._current_timer = None
+        # Os próximos timers ficam em uma heap ordenada por quando eles
+        # expiram. `_loaded_until` é a chave (expires, id) até onde todos
+        # os timers do banco de dados já estão na heap.
+        self._heap = []
+        self._heap_ids = set()
+        self._loaded_until = (datetime.datetime.min, 0)
+
+        # Impede que um timer criado durante o carregamento de
+        # um lote fique de fora da heap (ou entre duas vezes).
+        self._load_lock = asyncio.Lock()
+
+        # Avisa a task que um timer novo entrou na heap.
+        self._wakeup = asyncio.Event()
+
+        # Com mais de um processo usando a mesma tabela, os timers
+        # novos são avisados por NOTIFY em uma conexão dedicada.
+        self.shared = getattr(config, 'shared_timers', False)
+        self._listener = None
+
+        self._send_limit = asyncio.Semaphore(REMINDER_CONCURRENCY)
         self._task = bot.loop.create_task(self.dispatch_timers())
 
+        # Os timers curtos ficam em uma roda de tempo, com uma única
+        # task avançando ela, não importa quantos timers existam.
+        self._wheel = TimingWheel(bot.loop.time(), tick=SHORT_TIMER_TICK, size=SHORT_TIMER_SLOTS)
+        self._wheel_task = bot.loop.create_task(self.run_short_timers())
+
     def cog_unload(self):
         self._task.cancel()
+        self._wheel_task.cancel()
+
+        if self._listener is not None:
+            # Sem isso, a conexão caindo agora recomeçaria a task.
+            self._listener.remove_termination_listener(self.on_listener_terminated)
+            self.bot.loop.create_task(self.unlisten_timers())
 
     async def dispatch_timers(self):
+        # A heap é recarregada do zero sempre que a task (re)começa.
+        self._heap.clear()
+        self._heap_ids.clear()
+        self._loaded_until = (datetime.datetime.min, 0)
+
         try:
+            if self.shared:
+                await self.listen_timers()
+
             while not self.bot.is_closed():
-                timer = self._current_timer = await self.wait_for_active_timers(days=40)
+                if not self._heap:
+                    await self.load_timers()
+
+                if not self._heap:
+                    # Nada dentro da janela, então esperamos um timer
+                    # novo ou que a janela avance o suficiente.
+                    await self.wait_for_wakeup(TIMER_WINDOW.total_seconds() / 2)
+                    continue
+
+                expires, _ = self._heap[0]
+                delay = (expires - datetime.datetime.utcnow()).total_seconds()
+
+                # Um timer que expira antes pode entrar na heap
+                # enquanto esperamos, então olhamos ela de novo.
+                if delay > 0:
+                    await self.wait_for_wakeup(delay)
+                    continue
 
-                await discord.utils.sleep_until(timer.expires)
-                await self.call_timer(timer)
+                await self.call_due_timers()
         except asyncio.CancelledError:
             raise
         except (OSError, discord.ConnectionClosed, asyncpg.PostgresConnectionError):
             self._task.cancel()
             self._task = self.bot.loop.create_task(self.dispatch_timers())
 
-    async def call_timer(self, timer: Timer):
-        sql = 'DELETE FROM reminders WHERE id = $1;'
-        await self.bot.pool.execute(sql, timer.id)
+    async def wait_for_wakeup(self, timeout: float):
+        self._wakeup.clear()
 
-        self.bot.dispatch(f'{timer.event}_complete', timer)
-
-    async def wait_for_active_timers(self, *, days: int = 7):
-        timer = await self.get_active_timer(days=days)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def load_timers(self):
+        '''Carrega o próximo lote de timers da janela para a heap.'''
+        async with self._load_lock:
+            end = datetime.datetime.utcnow() + TIMER_WINDOW
+            expires, timer_id = self._loaded_until
+
+            sql = '''
+                SELECT * FROM reminders
+                WHERE (expires, id) > ($1, $2)
+                AND expires < $3
+                ORDER BY expires, id
+                LIMIT $4;
+            '''
+            records = await self.bot.pool.fetch(sql, expires, timer_id, end, TIMER_BATCH_SIZE)
+
+            for record in records:
+                self.push_timer(record['expires'], record['id'])
+
+            # Se o lote não veio cheio, então a janela inteira
+            # já está carregada. Caso contrário, o próximo lote
+            # começa depois do último timer carregado.
+            if len(records) < TIMER_BATCH_SIZE:
+                self._loaded_until = (end, 0)
+            else:
+                last = records[-1]
+                self._loaded_until = (last['expires'], last['id'])
+
+    def push_timer(self, expires: datetime.datetime, timer_id: int):
+        if timer_id in self._heap_ids:
+            return
 
-        if timer:
-            self._have_data.set()
-            return timer
+        self._heap_ids.add(timer_id)
+        heapq.heappush(self._heap, (expires, timer_id))
 
-        self._have_data.clear()
-        self._current_timer = None
+    async def queue_timer(self, expires: datetime.datetime, timer_id: int):
+        '''Coloca um timer novo na heap e acorda a task.
 
-        await self._have_data.wait()
-        return await self.get_active_timer(days=days)
+        Parameters
+        ----------
+        expires: :class:`datetime.datetime`
+            Quando o timer expira.
+        timer_id: :class:`int`
+            O ID do timer.
+        '''
+        # Timers depois de `_loaded_until` serão carregados quando
+        # a heap chegar neles, os outros entram na heap agora.
+        async with self._load_lock:
+            if (expires, timer_id) <= self._loaded_until:
+                self.push_timer(expires, timer_id)
+
+        self._wakeup.set()
+
+    async def call_due_timers(self):
+        '''Pega para si todos os timers que já expiraram e dispara
+        o evento de cada um deles.
+
+        Os timers são apagados na mesma query em que são lidos, e
+        timers travados por outro processo são pulados, então cada
+        timer é disparado uma única vez, não importa quantos
+        processos estejam usando a mesma tabela.
+        '''
+        now = datetime.datetime.utcnow()
 
-    async def get_active_timer(self, *, days: int = 7) -> Timer:
         sql = '''
-            SELECT * FROM reminders
-            WHERE expires < (CURRENT_DATE + $1::interval)
-            ORDER BY expires
-            LIMIT 1;
+            DELETE FROM reminders
+            WHERE id IN (
+                SELECT id FROM reminders
+                WHERE expires <= $1
+                ORDER BY expires
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *;
         '''
-        record = await self.bot.pool.fetchrow(sql, datetime.timedelta(days=days))
 
-        return Timer(record=record) if record else None
-        
-    async def short_timer_optimisation(self, seconds: int, timer: Timer):
-        await asyncio.sleep(seconds)
-        self.bot.dispatch(f'{timer.event}_complete', timer)
+        while True:
+            records = await self.bot.pool.fetch(sql, now, TIMER_BATCH_SIZE)
+
+            if len(records) > 1:
+                log.info(f'Claimed {len(records)} expired timers at once.')
+
+            for record in records:
+                timer = Timer(record=record)
+                self.bot.dispatch(f'{timer.event}_complete', timer)
+
+            if len(records) < TIMER_BATCH_SIZE:
+                break
+
+        # Tudo que já expirou sai da heap, inclusive timers
+        # que foram disparados por outro processo.
+        while self._heap and self._heap[0][0] <= now:
+            _, timer_id = heapq.heappop(self._heap)
+            self._heap_ids.discard(timer_id)
+
+    async def listen_timers(self):
+        '''Começa a receber os timers criados por outros processos.'''
+        if self._listener is not None:
+            if not self._listener.is_closed():
+                return
+
+            # A conexão antiga caiu, então devolvemos ela para a pool.
+            listener, self._listener = self._listener, None
+            await self.bot.pool.release(listener)
+
+        listener = await self.bot.pool.acquire()
+
+        # A task pode ficar dias esperando o próximo timer, então
+        # precisamos saber na hora caso a conexão caia.
+        listener.add_termination_listener(self.on_listener_terminated)
+        await listener.add_listener(TIMER_CHANNEL, self.on_timer_notify)
+
+        self._listener = listener
+
+    async def unlisten_timers(self):
+        listener, self._listener = self._listener, None
+
+        try:
+            await listener.remove_listener(TIMER_CHANNEL, self.on_timer_notify)
+        finally:
+            await self.bot.pool.release(listener)
+
+    def on_listener_terminated(self, connection: asyncpg.Connection):
+        # Os avisos enviados enquanto a conexão estava caída foram
+        # perdidos, então a task recomeça: ela recarrega a heap e
+        # volta a escutar o canal em uma conexão nova.
+        log.warning('Lost the connection listening for new timers, restarting dispatch.')
+
+        self._task.cancel()
+        self._task = self.bot.loop.create_task(self.dispatch_timers())
+
+    def on_timer_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str):
+        data = json.loads(payload)
+        expires = datetime.datetime.fromisoformat(data['expires'])
+
+        self.bot.loop.create_task(self.queue_timer(expires, data['id']))
+
+    async def run_short_timers(self):
+        loop = self.bot.loop
+        wheel = self._wheel
+
+        # Os timers curtos sobrevivem a um reinício, já que eles
+        # também estão no Redis. Caso o carregamento falhe, ele
+        # é tentado de novo a cada volta da roda.
+        loaded = False
+        ticks = 0
+
+        while not self.bot.is_closed():
+            await asyncio.sleep(max(wheel.now + wheel.tick - loop.time(), 0))
+
+            due = wheel.advance()
+            ticks += 1
+
+            # Esta é a única task dos timers curtos, então
+            # nenhum erro pode fazer ela parar.
+            try:
+                if not loaded and (ticks == 1 or ticks % wheel.size == 0):
+                    await self.load_short_timers()
+                    loaded = True
+
+                if due:
+                    await self.call_short_timers(due)
+
+                if ticks % wheel.size == 0:
+                    await self.sweep_short_timers()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # O que não foi disparado continua no Redis e
+                # será encontrado na próxima verificação.
+                log.exception('Could not dispatch short timers.')
+
+    async def load_short_timers(self):
+        '''Coloca na roda todos os timers curtos salvos no Redis.'''
+        members = await self.bot.cache.zrange(SHORT_TIMER_KEY, 0, -1, withscores=True)
+
+        for member, expires in members:
+            self.add_short_timer(member, expires)
+
+        if members:
+            log.info(f'Loaded {len(members)} short timers.')
+
+    def add_short_timer(self, member: str, expires: float):
+        # A roda usa o relógio do loop, não o do sistema.
+        deadline = self.bot.loop.time() + (expires - time.time())
+        self._wheel.add(deadline, member)
+
+    async def call_short_timers(self, members: list[str]):
+        '''Dispara os timers curtos que expiraram. Somente quem conseguir
+        removê-los do Redis os dispara, então um timer nunca é disparado
+        duas vezes, mesmo com mais de um processo.
+
+        Parameters
+        ----------
+        members: list[:class:`str`]
+            Os timers, da forma que estão salvos no Redis.
+        '''
+        pipe = self.bot.cache.pipeline()
+        claims = [pipe.zrem(SHORT_TIMER_KEY, member) for member in members]
+        await pipe.execute()
+
+        for member, claim in zip(members, claims):
+            if not await claim:
+                continue
+
+            try:
+                timer = Timer.from_json(member)
+            except (ValueError, KeyError, TypeError):
+                log.exception(f'Discarding malformed short timer {member!r}.')
+            else:
+                self.bot.dispatch(f'{timer.event}_complete', timer)
+
+    async def sweep_short_timers(self):
+        '''Dispara os timers curtos que deveriam ter expirado
+        mas não estão na roda deste processo.
+        '''
+        members = await self.bot.cache.zrangebyscore(SHORT_TIMER_KEY, max=time.time() - SHORT_TIMER_GRACE)
+
+        if members:
+            log.info(f'Found {len(members)} overdue short timers.')
+            await self.call_short_timers(members)
 
     async def create_timer(self, *args, **kwargs) -> Timer:
         '''Cria um timer.
@@ -188,24 +575,35 @@ class Reminder(commands.Cog, name='Lembretes'):
         timer = Timer.temporary(expires=when, created=now, event=event, args=args, kwargs=kwargs)
         
         delta = (when - now).total_seconds()
-        if delta <= 60:
-            self.bot.loop.create_task(self.short_timer_optimisation(delta, timer))
+        if delta <= SHORT_TIMER_MAX:
+            member = timer.to_json()
+            expires = when.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+            await self.bot.cache.zadd(SHORT_TIMER_KEY, expires, member)
+            self.add_short_timer(member, expires)
+
             return timer
             
+        # Os lembretes também guardam dono, canal e
+        # conteúdo em colunas próprias, veja `Reminders`.
+        owner_id, channel_id, content = args if event == 'reminder' else (None, None, None)
+
         sql = '''
-            INSERT INTO reminders (event, extra, expires, created)
-            VALUES ($1, $2::jsonb, $3, $4)
+            INSERT INTO reminders (event, extra, expires, created, owner_id, channel_id, content)
+            VALUES ($1, $2::jsonb, $3, $4, $5, $6, $7)
             RETURNING id;
         '''
-        record = await self.bot.pool.fetchrow(sql, event, {'args': args, 'kwargs': kwargs}, when, now)
+        extra = {'args': args, 'kwargs': kwargs}
+        record = await self.bot.pool.fetchrow(sql, event, extra, when, now, owner_id, channel_id, content)
         timer.id = record[0]
 
-        if delta <= (86400 * 40):
-            self._have_data.set()
+        await self.queue_timer(when, timer.id)
 
-        if self._current_timer and when < self._current_timer.expires:
-            self._task.cancel()
-            self._task = self.bot.loop.create_task(self.dispatch_timers())
+        # Os outros processos também precisam saber do timer novo,
+        # caso contrário eles só o veriam no próximo carregamento.
+        if self.shared:
+            payload = json.dumps({'id': timer.id, 'expires': when.isoformat()})
+            await self.bot.pool.execute('SELECT pg_notify($1, $2);', TIMER_CHANNEL, payload)
 
         return timer
 
@@ -225,56 +623,77 @@ class Reminder(commands.Cog, name='Lembretes'):
         '''
         Mostra seus timers ativos.
         '''
-        sql = '''
-            SELECT id, expires, extra #>> '{args,2}' FROM reminders
-            WHERE event = 'reminder'
-            AND extra #>> '{args,0}'= $1
-            ORDER BY expires
-            LIMIT 10;
-         '''
-        fetch = await ctx.pool.fetch(sql, str(ctx.author.id))
-
-        if len(fetch) == 0:
+        source = ReminderPageSource(ctx, ctx.author.id)
+        await source.prepare()
+
+        if not source.get_max_pages():
             return await ctx.reply('Você não possui nenhum lembrete ativo.')
 
-        fields = []
+        menu = MenuPagesBase(source, clear_reactions_after=True)
+        await menu.start(ctx, wait=True)
+
+    @reminder.command(name='delete')
+    async def reminder_delete(self, ctx: ErisContext, reminder_id: int):
+        '''
+        Apaga um de seus lembretes.
+        '''
+        sql = '''
+            DELETE FROM reminders
+            WHERE id = $1 AND event = 'reminder' AND owner_id = $2
+            RETURNING id;
+        '''
+        deleted = await ctx.pool.fetchval(sql, reminder_id, ctx.author.id)
+
+        if deleted is None:
+            return await ctx.reply('Não encontrei nenhum lembrete seu com esse ID.')
+
+        await ctx.reply(f'Lembrete `{reminder_id}` apagado.')
 
-        for reminder_id, expires, message in fetch:
-            now = datetime.datetime.utcnow()
-            delta = humanize.precisedelta(expires - now.replace(microsecond=0), format='%0.0f')
+    @reminder.command(name='clear', ignore_extra=False)
+    async def reminder_clear(self, ctx: ErisContext):
+        '''
+        Apaga todos os seus lembretes.
+        '''
+        sql = "DELETE FROM reminders WHERE event = 'reminder' AND owner_id = $1;"
+        status = await ctx.pool.execute(sql, ctx.author.id)
 
-            field = {'name': f'[{reminder_id}] Em {delta}', 'value': message, 'inline': False}
-            fields.append(field)
+        # O status vem no formato `DELETE <quantidade>`.
+        count = int(status.split()[-1])
 
-        menu = ErisMenuPages(fields, source=SourceType.FIELD)
-        await menu.start(ctx, wait=True)
+        if not count:
+            return await ctx.reply('Você não possui nenhum lembrete ativo.')
+
+        await ctx.reply(f'{count} lembretes apagados.')
 
     @commands.Cog.listener()
     async def on_reminder_complete(self, timer: Timer):
         # Só quero que os timers respondam caso o bot esteja pronto.
         await self.bot.wait_until_ready()
 
-        author_id, channel_id, content = timer.args
+        # Quando muitos timers expiram juntos, somente alguns
+        # lembretes são enviados de cada vez.
+        async with self._send_limit:
+            author_id, channel_id, content = timer.args
 
-        author = self.bot.cosmic.get_member(author_id)
-        channel = self.bot.cosmic.get_channel(channel_id)
+            author = await self.bot.get_or_fetch_member(author_id)
+            channel = self.bot.cosmic.get_channel(channel_id)
 
-        if not channel:
-            return
+            if not author or not channel:
+                return
 
-        # Uma maneira hardcoded de obter o link da mensagem.
-        message_id = timer.kwargs.get('message_id')
-        message_url = f'https://discord.com/channels/{self.bot.cosmic.id}/{channel.id}/{message_id}'
+            # Uma maneira hardcoded de obter o link da mensagem.
+            message_id = timer.kwargs.get('message_id')
+            message_url = f'https://discord.com/channels/{self.bot.cosmic.id}/{channel.id}/{message_id}'
 
-        messages = [
-            f'Há {timer.delta}: **{content}**.',
-            f'**Clique [aqui]({message_url}) para ver a mensagem.**'
-        ]
+            messages = [
+                f'Há {timer.delta}: **{content}**.',
+                f'**Clique [aqui]({message_url}) para ver a mensagem.**'
+            ]
 
-        embed = discord.Embed(description='\n\n'.join(messages), colour=0x2f3136)
-        embed.set_author(name=author.display_name, icon_url=author.avatar_url)
+            embed = discord.Embed(description='\n\n'.join(messages), colour=0x2f3136)
+            embed.set_author(name=author.display_name, icon_url=author.avatar_url)
 
-        await channel.send(author.mention, embed=embed)
+            await channel.send(author.mention, embed=embed)
 
 
 def setup(bot: Eris):
@@ -155,7 +155,7 @@ class Starboard(commands.Cog):
             return
 
         method = getattr(self, f'{fmt}_message')
-        user = payload.member or (await self.get_or_fetch_member(payload.user_id))
+        user = payload.member or (await self.bot.get_or_fetch_member(payload.user_id))
 
         if not user or user.bot:
             return
@@ -165,30 +165,6 @@ class Starboard(commands.Cog):
         except StarError:
             pass
 
-    async def get_or_fetch_member(self, member_id: int) -> Optional[discord.Member]:
-        '''Tenta pegar um membro do cache, caso não consiga, faz
-        uma requisição HTTP.
-
-        Parameters
-        ----------
-        member_id: :class:`int`
-            O ID do membro.
-
-        Returns
-        -------
-        Optional[:class:`discord.Member`]
-            O membro desejado ou `None` caso não tenha sido encontrado.
-        '''
-        member = self.bot.cosmic.get_member(member_id)
-
-        if member:
-            return member
-
-        try:
-            return await self.bot.cosmic.fetch_member(member_id)
-        except discord.HTTPException:
-            return None
-
     async def star_message(self, channel: discord.TextChannel, message_id: int, starrer_id: int):
         '''Adiciona uma estrela a uma mensagem.
 
@@ -43,9 +43,11 @@ class Status(commands.Cog):
         self.bot = bot
 
     async def update_status(self):
-        users = len(self.bot.users)
+        # O total vem do próprio servidor, assim a contagem
+        # funciona mesmo quando os membros não estão no cache.
+        members = self.bot.cosmic.member_count
 
-        name = f'?help | {users} usuários'
+        name = f'?help | {members} usuários'
         activity_type = discord.ActivityType.listening
 
         activity = discord.Activity(name=name, type=activity_type)
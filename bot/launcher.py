@@ -30,22 +30,36 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+# O profiler é criado antes dos outros imports para
+# que o tempo gasto com eles também seja medido.
+from utils.profiler import StartupProfiler
+profiler = StartupProfiler()
+
 import colorama
 import asyncio
 import importlib
 import traceback
 import logging
 import contextlib
-from logging.handlers import RotatingFileHandler
+import collections
+import timeit
+import subprocess
+import sys
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-import click
-import humanize
+with profiler.phase('import:third_party'):
+    import click
+
+with profiler.phase('import:eris'):
+    import config
+    from eris import Eris
+    from utils import experience
+    from utils.database import create_pool, Table
+    from utils.modules import get_all_extensions
 
-import config
-from eris import Eris
-from utils.database import create_pool, Table
-from utils.modules import get_all_extensions
+profiler.mark('imports')
 
 
 colorama.init()
@@ -57,6 +71,11 @@ DIM   = colorama.Style.DIM
 RESET = colorama.Style.RESET_ALL
 
 
+# Tempo máximo (em segundos) que importar o bot
+# e todas as extensões pode levar.
+IMPORT_BUDGET = 2.0
+
+
 class RemoveNoise(logging.Filter):
     def __init__(self):
         super().__init__(name='discord.state')
@@ -67,6 +86,32 @@ class RemoveNoise(logging.Filter):
         return True
 
 
+# Logs muito frequentes: somente um a cada N registros de
+# cada logger é escrito. Avisos e erros sempre passam.
+LOG_SAMPLING = {
+    'extensions.levels.grants': 10
+}
+
+
+class SampleLogs(logging.Filter):
+    def __init__(self, rates: dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self.seen = collections.Counter()
+
+    def filter(self, record: logging.LogRecord):
+        rate = self.rates.get(record.name)
+
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+
+        # O primeiro registro sempre passa, depois um a cada `rate`.
+        count = self.seen[record.name]
+        self.seen[record.name] += 1
+
+        return count % rate == 0
+
+
 @contextlib.contextmanager
 def setup_logging():
     # Criar a pasta `logs/` antes de inicializar o logger.
@@ -74,6 +119,11 @@ def setup_logging():
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
 
+    # Caso algo falhe antes deles existirem, o erro original
+    # não é trocado por um `UnboundLocalError` no `finally`.
+    logger = logging.getLogger()
+    listener = file_handler = None
+
     try:
         # __enter__
         max_bytes = 32 * 1024 * 1024 # 32 MiB
@@ -82,42 +132,58 @@ def setup_logging():
         logging.getLogger('discord.http').setLevel(logging.WARN)
         logging.getLogger('discord.state').addFilter(RemoveNoise())
 
-        logger = logging.getLogger()
         logger.setLevel(logging.INFO)
 
         dt_format = r'%Y-%m-%d %H:%M:%S'
         log_format = '[{asctime}] [{levelname}] {name}: {message}'
 
         kwargs = {'filename': 'logs/eris.log', 'encoding': 'utf-8', 'mode': 'w'}
-        handler = RotatingFileHandler(**kwargs, maxBytes=max_bytes, backupCount=5)
+        file_handler = RotatingFileHandler(**kwargs, maxBytes=max_bytes, backupCount=5)
         formatter = logging.Formatter(log_format, dt_format, style='{')
 
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        file_handler.setFormatter(formatter)
+
+        # O event loop só coloca os registros em uma fila, quem
+        # escreve no arquivo (e faz a rotação) é outra thread.
+        log_queue = queue.SimpleQueue()
+
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(SampleLogs(LOG_SAMPLING))
+        logger.addHandler(queue_handler)
+
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
 
         yield
     finally:
         # __exit__
-        for handler in logger.handlers:
+        # Parar a thread escreve o que ainda estiver na fila.
+        if listener is not None:
+            listener.stop()
+
+        for handler in logger.handlers[:]:
             handler.close()
             logger.removeHandler(handler)
 
+        if file_handler is not None:
+            file_handler.close()
 
-def run_bot():
-    # Ativamos o i18n em português do módulo `humanize`.
-    humanize.activate('pt_BR')
 
-    bot = Eris()
+def run_bot(*, profile_startup: str = None):
+    bot = Eris(profiler=profiler, profile_startup=profile_startup)
     bot.run(config.token)
 
 
 @click.group(invoke_without_command=True, options_metavar='[options]')
+@click.option('--profile-startup', help='salva o tempo de cada fase da inicialização', is_flag=True)
+@click.option('--profile-output', help='onde salvar o relatório da inicialização',
+              default='logs/startup.json', show_default=True)
 @click.pass_context
-def main(ctx: click.Context):
+def main(ctx: click.Context, profile_startup: bool, profile_output: str):
     '''Inicializa o bot.'''
     if not ctx.invoked_subcommand:
         with setup_logging():
-            run_bot()
+            run_bot(profile_startup=profile_output if profile_startup else None)
 
 
 @main.group(short_help='coisas do banco de dados', options_metavar='[options]')
@@ -152,5 +218,99 @@ def init(quiet: bool):
             click.echo(GREEN + f"[{table.__module__}] Created table '{table.__table_name__}'" + RESET)
 
 
+@main.group(short_help='benchmarks internos', options_metavar='[options]')
+def bench():
+    pass
+
+
+@bench.command(short_help='compara os cálculos de nível', options_metavar='[options]')
+@click.option('-n', '--number', help='repetições por nível', default=1000)
+def levels(number: int):
+    '''Compara o cálculo de níveis em loop com a tabela pré-calculada.'''
+    def loop_total_exp(level: int) -> int:
+        return sum(experience.get_level_exp(i) for i in range(level))
+
+    def loop_level_from_exp(exp: int) -> int:
+        level = 0
+
+        while exp >= experience.get_level_exp(level):
+            exp -= experience.get_level_exp(level)
+            level += 1
+
+        return level
+
+    # Uma quantidade de experiência no meio de cada nível.
+    samples = [experience.get_total_exp(level) + experience.get_level_exp(level) // 2 for level in range(101)]
+
+    def run_loop():
+        for exp in samples:
+            level = loop_level_from_exp(exp)
+            loop_total_exp(level)
+
+    def run_table():
+        for exp in samples:
+            experience.get_level_progress(exp)
+
+    for exp in samples:
+        assert loop_level_from_exp(exp) == experience.get_level_from_exp(exp)
+
+    loop_time = timeit.timeit(run_loop, number=number)
+    table_time = timeit.timeit(run_table, number=number)
+
+    calls = number * len(samples)
+    click.echo(f'loop:   {loop_time / calls * 1e6:.3f}µs por chamada ({loop_time:.3f}s)')
+    click.echo(f'tabela: {table_time / calls * 1e6:.3f}µs por chamada ({table_time:.3f}s)')
+    click.echo(GREEN + f'{loop_time / table_time:.1f}x mais rápido nos níveis 0..100' + RESET)
+
+
+@main.command(name='check-imports', short_help='verifica o tempo de import', options_metavar='[options]')
+@click.option('-b', '--budget', help='tempo máximo em segundos', default=IMPORT_BUDGET, show_default=True)
+@click.option('-n', '--top', help='quantos módulos mais lentos mostrar', default=10, show_default=True)
+def check_imports(budget: float, top: int):
+    '''Falha caso importar o bot passe do tempo máximo.'''
+    # Usamos um novo processo para que nada esteja importado ainda.
+    code = (
+        'import importlib, time\n'
+        'start = time.perf_counter()\n'
+        'import eris\n'
+        'from utils.modules import get_all_extensions\n'
+        'for ext in get_all_extensions():\n'
+        '    importlib.import_module(ext)\n'
+        'print(time.perf_counter() - start)\n'
+    )
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+
+    if result.returncode != 0:
+        click.echo(DIM + result.stderr + RESET, nl=False)
+        click.echo(RED + 'Could not import the bot.' + RESET)
+        raise SystemExit(1)
+
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+
+    # Cada linha do `-X importtime` tem o formato:
+    # "import time: <self us> | <cumulative us> | <module>".
+    modules = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        self_us, _, name = line[len('import time:'):].split('|')
+
+        if self_us.strip().isdigit():
+            modules.append((int(self_us), name.strip()))
+
+    modules.sort(reverse=True)
+
+    for self_us, name in modules[:top]:
+        click.echo(DIM + f'{self_us / 1000:8.1f}ms  {name}' + RESET)
+
+    if elapsed > budget:
+        click.echo(RED + f'Importing the bot took {elapsed:.3f}s, over the {budget:.3f}s budget.' + RESET)
+        raise SystemExit(1)
+
+    click.echo(GREEN + f'Importing the bot took {elapsed:.3f}s ({budget:.3f}s budget).' + RESET)
+
+
 if __name__ == '__main__':
     main()
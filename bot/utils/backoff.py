@@ -0,0 +1,91 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+import random
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+
+log = logging.getLogger(__name__)
+
+
+# Erros que normalmente indicam que o serviço ainda
+# não está pronto e que vale a pena tentar de novo.
+RETRY_EXCEPTIONS = (OSError, asyncio.TimeoutError)
+
+
+async def retry(factory: Callable[[], Awaitable[Any]], *, name: str, attempts: int = 5,
+                timeout: float = 10.0, base: float = 0.5, cap: float = 8.0,
+                exceptions: tuple[type[BaseException], ...] = RETRY_EXCEPTIONS) -> Any:
+    '''Executa uma corotina, tentando novamente com backoff exponencial.
+
+    Parameters
+    ----------
+    factory: Callable[[], Awaitable[:class:`typing.Any`]]
+        Função que cria a corotina a cada tentativa.
+    name: :class:`str`
+        O nome da operação, usado nos logs.
+    attempts: Optional[:class:`int`]
+        O número máximo de tentativas, por padrão é `5`.
+    timeout: Optional[:class:`float`]
+        O tempo máximo (em segundos) de cada tentativa, por padrão é `10`.
+    base: Optional[:class:`float`]
+        A espera (em segundos) depois da primeira falha, por padrão é `0.5`.
+    cap: Optional[:class:`float`]
+        A espera máxima (em segundos) entre tentativas, por padrão é `8`.
+    exceptions: tuple[type[:class:`BaseException`], ...]
+        Os erros que causam uma nova tentativa.
+
+    Returns
+    -------
+    :class:`typing.Any`
+        O resultado da corotina.
+
+    Raises
+    ------
+    Exception
+        O último erro, caso todas as tentativas falhem.
+    '''
+    for attempt in range(1, attempts + 1):
+        try:
+            return await asyncio.wait_for(factory(), timeout=timeout)
+        except exceptions as e:
+            if attempt == attempts:
+                raise
+
+            # Um pouco de aleatoriedade evita que vários
+            # processos tentem de novo ao mesmo tempo.
+            delay = min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+            log.warning(f'{name} failed ({e!r}), retrying in {delay:.2f}s ({attempt}/{attempts}).')
+            await asyncio.sleep(delay)
@@ -30,9 +30,148 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
 from asyncio import AbstractEventLoop
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
 
-from aioredis import Redis, create_redis_pool
+import asyncpg
+from aioredis import Redis, ReplyError, create_redis_pool
+from aioredis.commands import Pipeline
+
+
+log = logging.getLogger(__name__)
+
+
+# Quantas linhas são lidas do banco de dados e
+# enviadas ao Redis por vez no carregamento do cache.
+BULK_LOAD_CHUNK_SIZE = 5000
+
+# Hash com a versão de cada namespace carregado no cache e a key
+# que marca que o bot foi desligado corretamente, ou seja, que o
+# cache continua igual ao banco de dados.
+NAMESPACES_KEY = 'eris/namespaces'
+CLEAN_SHUTDOWN_KEY = 'eris/clean-shutdown'
+
+# Sorted set com os processos rodando agora, com o momento em que
+# cada um deixa de ser considerado vivo como score. Cada processo
+# renova sua entrada a cada `INSTANCE_HEARTBEAT` segundos.
+INSTANCES_KEY = 'eris/instances'
+INSTANCE_TTL = 30
+INSTANCE_HEARTBEAT = 10
+
+# Somente um processo carrega cada namespace por vez. A trava
+# expira sozinha caso o processo morra durante o carregamento.
+NAMESPACE_LOCK_TTL = 600
+
+# Sentinela para diferenciar uma key ausente de um valor `None`.
+MISSING = object()
+
+
+class LRUCache:
+    '''Um cache em memória com limite de tamanho e tempo de vida.
+
+    Usado como uma primeira camada na frente do Redis para valores
+    lidos com muita frequência. Os valores mais antigos são removidos
+    quando o limite é atingido.
+
+    Parameters
+    ----------
+    max_size: :class:`int`
+        A quantidade máxima de valores guardados.
+    ttl: :class:`float`
+        Por quantos segundos um valor é válido.
+    '''
+    def __init__(self, *, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        # Aumenta a cada remoção. Quem busca um valor fora do cache
+        # guarda a versão antes da busca, assim um valor lido antes
+        # de uma remoção não volta para o cache, veja `set`.
+        self.version = 0
+
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        '''Retorna um valor do cache.
+
+        Parameters
+        ----------
+        key: :class:`typing.Hashable`
+            A key do valor.
+        default: :class:`typing.Any`
+            O que retornar caso o valor não esteja no cache
+            ou tenha expirado, por padrão é `MISSING`.
+
+        Returns
+        -------
+        :class:`typing.Any`
+            O valor guardado ou `default`.
+        '''
+        try:
+            value, expires = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, *, version: Optional[int] = None):
+        '''Guarda um valor no cache.
+
+        Parameters
+        ----------
+        key: :class:`typing.Hashable`
+            A key do valor.
+        value: :class:`typing.Any`
+            O valor a ser guardado.
+        version: Optional[:class:`int`]
+            A `version` do cache antes do valor ser buscado. Caso
+            algo tenha sido removido desde então, o valor pode estar
+            desatualizado e não é guardado.
+        '''
+        if version is not None and version != self.version:
+            return
+
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        '''Remove um valor do cache.
+
+        Parameters
+        ----------
+        key: :class:`typing.Hashable`
+            A key do valor.
+        '''
+        self._data.pop(key, None)
+        self.version += 1
+
+    def clear(self):
+        '''Remove todos os valores do cache.'''
+        self._data.clear()
+        self.version += 1
 
 
 async def create_cache(address: str, *, loop: AbstractEventLoop) -> Redis:
@@ -50,8 +189,289 @@ async def create_cache(address: str, *, loop: AbstractEventLoop) -> Redis:
     :class:`Redis`
         Uma instância de uma sessão do Redis.
     '''
-    pool = await create_redis_pool(address=address, loop=loop, encoding='utf-8')
-    # Antes de retornar a pool, quero remover tudo do cache
-    # para manter as coisas mais limpas e organizadas.
-    await pool.flushall()
-    return pool
+    # O cache não é mais limpo aqui: cada namespace é
+    # recarregado somente quando necessário, veja `sync_namespace`.
+    return await create_redis_pool(address=address, loop=loop, encoding='utf-8')
+
+
+async def mark_clean_shutdown(redis: Redis):
+    '''Marca que o bot foi desligado corretamente.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+    '''
+    await redis.set(CLEAN_SHUTDOWN_KEY, 1)
+
+
+async def pop_clean_shutdown(redis: Redis) -> bool:
+    '''Verifica (e remove) a marca de desligamento correto.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+
+    Returns
+    -------
+    :class:`bool`
+        Se o último desligamento foi correto.
+    '''
+    tr = redis.multi_exec()
+    marker = tr.get(CLEAN_SHUTDOWN_KEY)
+    tr.delete(CLEAN_SHUTDOWN_KEY)
+    await tr.execute()
+
+    return await marker is not None
+
+
+async def register_instance(redis: Redis, instance_id: str):
+    '''Marca (ou renova) um processo como vivo.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+    instance_id: :class:`str`
+        O ID do processo.
+    '''
+    await redis.zadd(INSTANCES_KEY, time.time() + INSTANCE_TTL, instance_id)
+
+
+async def unregister_instance(redis: Redis, instance_id: str):
+    '''Remove um processo da lista de processos vivos.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+    instance_id: :class:`str`
+        O ID do processo.
+    '''
+    await redis.zrem(INSTANCES_KEY, instance_id)
+
+
+async def count_live_instances(redis: Redis) -> int:
+    '''Conta quantos processos estão rodando agora.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+
+    Returns
+    -------
+    :class:`int`
+        A quantidade de processos vivos.
+    '''
+    now = time.time()
+
+    # Processos que morreram sem se remover expiram sozinhos.
+    await redis.zremrangebyscore(INSTANCES_KEY, max=now)
+    return await redis.zcount(INSTANCES_KEY, min=now)
+
+
+async def clear_keys(redis: Redis, pattern: str, *, count: int = 1000) -> int:
+    '''Remove as keys que seguem um padrão sem bloquear o Redis.
+
+    Parameters
+    ----------
+    redis: :class:`Redis`
+        A sessão do Redis.
+    pattern: :class:`str`
+        O padrão das keys, no formato do `SCAN MATCH`.
+    count: Optional[:class:`int`]
+        Quantas keys remover por vez, por padrão é `1000`.
+
+    Returns
+    -------
+    :class:`int`
+        A quantidade de keys removidas.
+    '''
+    removed = 0
+    keys = []
+
+    async for key in redis.iscan(match=pattern, count=count):
+        keys.append(key)
+
+        if len(keys) >= count:
+            removed += await redis.unlink(*keys)
+            keys.clear()
+
+    if keys:
+        removed += await redis.unlink(*keys)
+
+    return removed
+
+
+class Script:
+    '''Um script Lua executado atomicamente no Redis.
+
+    O script é chamado pelo seu SHA1 com `EVALSHA`, assim não
+    enviamos o código inteiro a cada chamada. Caso o Redis ainda
+    não conheça o script, ele é enviado uma vez com `EVAL`.
+
+    Parameters
+    ----------
+    source: :class:`str`
+        O código Lua do script.
+    '''
+    def __init__(self, source: str):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    async def __call__(self, redis: Redis, keys: Iterable[str] = (), args: Iterable[Any] = ()) -> Any:
+        keys = list(keys)
+        args = list(args)
+
+        try:
+            return await redis.evalsha(self.sha, keys=keys, args=args)
+        except ReplyError as e:
+            if not str(e).startswith('NOSCRIPT'):
+                raise
+
+            return await redis.eval(self.source, keys=keys, args=args)
+
+
+
+# Só remove a trava caso ela ainda seja nossa, ou seja,
+# caso ela não tenha expirado e sido pega por outro processo.
+RELEASE_LOCK = Script('''
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+''')
+
+
+async def bulk_load(pool: asyncpg.Pool, redis: Redis, query: str,
+                    callback: Callable[[Pipeline, list[asyncpg.Record]], Any], *,
+                    name: str, chunk_size: int = BULK_LOAD_CHUNK_SIZE) -> int:
+    '''Carrega uma tabela do banco de dados no cache.
+
+    As linhas são lidas com um cursor em lotes de `chunk_size`
+    e cada lote é enviado ao Redis em um único pipeline, assim
+    o uso de memória não depende do tamanho da tabela.
+
+    Parameters
+    ----------
+    pool: :class:`asyncpg.Pool`
+        O pool de conexão do PostgreSQL.
+    redis: :class:`Redis`
+        A sessão do Redis.
+    query: :class:`str`
+        A query que retorna as linhas a serem carregadas.
+    callback: Callable[[:class:`Pipeline`, list[:class:`asyncpg.Record`]], Any]
+        Função que adiciona os comandos de um lote no pipeline.
+    name: :class:`str`
+        O nome do carregamento, usado nos logs.
+    chunk_size: Optional[:class:`int`]
+        Quantas linhas carregar por vez, por padrão é `5000`.
+
+    Returns
+    -------
+    :class:`int`
+        A quantidade de linhas carregadas.
+    '''
+    start = time.perf_counter()
+    total = 0
+
+    async with pool.acquire() as conn:
+        # Cursores só funcionam dentro de uma transação.
+        async with conn.transaction():
+            cursor = await conn.cursor(query)
+
+            while records := await cursor.fetch(chunk_size):
+                pipe = redis.pipeline()
+                callback(pipe, records)
+                await pipe.execute()
+
+                total += len(records)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0
+
+    log.info(f"Loaded {total} rows into '{name}' in {elapsed:.2f}s ({rate:.0f} rows/s).")
+    return total
+
+
+async def sync_namespace(pool: asyncpg.Pool, redis: Redis, query: str,
+                         callback: Callable[[Pipeline, list[asyncpg.Record]], Any], *,
+                         name: str, version: int, pattern: str, warm: bool,
+                         legacy_patterns: Iterable[str] = ()) -> int:
+    '''Garante que um namespace do cache está carregado.
+
+    Caso o bot tenha sido desligado corretamente (`warm`) e a versão
+    guardada seja a mesma, o cache já está igual ao banco de dados
+    e nada é feito. Caso contrário as keys do namespace são removidas
+    e a tabela é carregada novamente com :func:`bulk_load`.
+
+    Parameters
+    ----------
+    pool: :class:`asyncpg.Pool`
+        O pool de conexão do PostgreSQL.
+    redis: :class:`Redis`
+        A sessão do Redis.
+    query: :class:`str`
+        A query que retorna as linhas a serem carregadas.
+    callback: Callable[[:class:`Pipeline`, list[:class:`asyncpg.Record`]], Any]
+        Função que adiciona os comandos de um lote no pipeline.
+    name: :class:`str`
+        O nome do namespace.
+    version: :class:`int`
+        A versão do formato das keys do namespace. Deve ser
+        incrementada sempre que esse formato mudar.
+    pattern: :class:`str`
+        O padrão das keys do namespace, no formato do `SCAN MATCH`.
+    warm: :class:`bool`
+        Se o cache continua válido: o último desligamento foi
+        correto ou outros processos estão rodando agora.
+    legacy_patterns: Iterable[:class:`str`]
+        Padrões de keys de formatos antigos do namespace, que
+        são removidas junto quando o namespace é carregado.
+
+    Returns
+    -------
+    :class:`int`
+        A quantidade de linhas carregadas.
+    '''
+    if warm and await redis.hget(NAMESPACES_KEY, name) == str(version):
+        log.info(f"Namespace '{name}' (v{version}) is up to date, skipping warm-up.")
+        return 0
+
+    # Dois processos ligando ao mesmo tempo não podem apagar e
+    # carregar o mesmo namespace, então somente quem conseguir a
+    # trava carrega. Os outros esperam ele terminar.
+    lock = f'{NAMESPACES_KEY}/{name}/lock'
+    token = uuid.uuid4().hex
+
+    if not await redis.set(lock, token, expire=NAMESPACE_LOCK_TTL, exist=redis.SET_IF_NOT_EXIST):
+        log.info(f"Namespace '{name}' is being loaded by another process, waiting.")
+
+        while await redis.exists(lock):
+            await asyncio.sleep(1)
+
+        if await redis.hget(NAMESPACES_KEY, name) != str(version):
+            raise RuntimeError(f"Namespace '{name}' could not be loaded by another process.")
+
+        return 0
+
+    try:
+        # Invalidamos a versão antes de carregar, assim um
+        # carregamento interrompido é refeito na próxima vez.
+        await redis.hdel(NAMESPACES_KEY, name)
+
+        removed = 0
+
+        for key_pattern in (pattern, *legacy_patterns):
+            removed += await clear_keys(redis, key_pattern)
+
+        log.info(f"Cleared {removed} keys from namespace '{name}'.")
+
+        total = await bulk_load(pool, redis, query, callback, name=name)
+        await redis.hset(NAMESPACES_KEY, name, version)
+    finally:
+        await RELEASE_LOCK(redis, keys=[lock], args=[token])
+
+    return total
@@ -0,0 +1,178 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+from typing import Any, Callable, Optional
+
+import discord
+from aioredis import Redis
+from discord.ext import commands
+from discord.ext.commands import BucketType, Cooldown
+
+from . import cache
+from .context import ErisContext
+
+
+# Janela fixa: o primeiro uso cria a key com o TTL do cooldown e
+# cada uso incrementa o contador. Passando do limite, retornamos
+# quantos milissegundos faltam para a key expirar.
+#
+# KEYS[1]: a key do bucket.
+# ARGV[1]: quantos usos são permitidos na janela.
+# ARGV[2]: o tamanho da janela em milissegundos.
+RATE_LIMIT = cache.Script('''
+    local count = redis.call('INCR', KEYS[1])
+
+    if count == 1 then
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+
+    if count > tonumber(ARGV[1]) then
+        return math.max(redis.call('PTTL', KEYS[1]), 1)
+    end
+
+    return 0
+''')
+
+
+class RedisCooldownMapping:
+    '''Um cooldown guardado no Redis, compartilhado entre processos
+    e que sobrevive a reinicializações do bot.
+
+    Parameters
+    ----------
+    rate: :class:`int`
+        Quantas vezes o cooldown pode ser usado por janela.
+    per: :class:`float`
+        O tamanho da janela em segundos.
+    type: :class:`BucketType`
+        O tipo de bucket do cooldown.
+    name: :class:`str`
+        O nome do cooldown, usado para montar as keys no Redis.
+    '''
+    def __init__(self, rate: int, per: float, type: BucketType, *, name: str):
+        self.cooldown = Cooldown(rate, per, type)
+        self.name = name
+
+    def get_key(self, message: discord.Message) -> str:
+        '''Retorna a key do bucket de uma mensagem.
+
+        Parameters
+        ----------
+        message: :class:`discord.Message`
+            A mensagem a ser usada de base.
+
+        Returns
+        -------
+        :class:`str`
+            A key do bucket no Redis.
+        '''
+        key = self.cooldown.type.get_key(message)
+
+        if isinstance(key, tuple):
+            key = ':'.join(map(str, key))
+
+        return f'cooldown/{self.name}/{key}'
+
+    async def update_rate_limit(self, redis: Redis, message: discord.Message) -> Optional[float]:
+        '''Registra um uso do cooldown.
+
+        Parameters
+        ----------
+        redis: :class:`Redis`
+            A sessão do Redis.
+        message: :class:`discord.Message`
+            A mensagem que usou o cooldown.
+
+        Returns
+        -------
+        Optional[:class:`float`]
+            Quantos segundos faltam para poder usar novamente
+            ou `None` caso o uso tenha sido permitido.
+        '''
+        cooldown = self.cooldown
+
+        keys = (self.get_key(message),)
+        args = (cooldown.rate, int(cooldown.per * 1000))
+
+        retry_after = await RATE_LIMIT(redis, keys, args)
+        return retry_after / 1000 if retry_after else None
+
+    async def reset(self, redis: Redis, message: discord.Message):
+        '''Reseta o bucket de uma mensagem.
+
+        Parameters
+        ----------
+        redis: :class:`Redis`
+            A sessão do Redis.
+        message: :class:`discord.Message`
+            A mensagem a ser usada de base.
+        '''
+        await redis.delete(self.get_key(message))
+
+
+def cooldown(rate: int, per: float, type: BucketType = BucketType.default) -> Callable[[Any], Any]:
+    '''Versão de :func:`commands.cooldown` guardada no Redis.
+
+    Parameters
+    ----------
+    rate: :class:`int`
+        Quantas vezes o comando pode ser usado por janela.
+    per: :class:`float`
+        O tamanho da janela em segundos.
+    type: :class:`BucketType`
+        O tipo de bucket do cooldown.
+    '''
+    def decorator(func: Any) -> Any:
+        callback = func.callback if isinstance(func, commands.Command) else func
+        mapping = None
+
+        async def predicate(ctx: ErisContext):
+            nonlocal mapping
+
+            # O `help` também roda os checks dos comandos, então
+            # só contamos o uso quando o próprio comando é invocado.
+            if ctx.command is None or ctx.command.callback is not callback:
+                return True
+
+            if mapping is None:
+                mapping = RedisCooldownMapping(rate, per, type, name=ctx.command.qualified_name)
+
+            retry_after = await mapping.update_rate_limit(ctx.cache, ctx.message)
+
+            if retry_after:
+                raise commands.CommandOnCooldown(mapping.cooldown, retry_after)
+
+            return True
+
+        return commands.check(predicate)(func)
+
+    return decorator
@@ -0,0 +1,134 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+from bisect import bisect_right
+
+
+# Nível máximo coberto pela tabela pré-calculada. Acima
+# disso usamos a fórmula fechada como fallback.
+MAX_TABLE_LEVEL = 100
+
+
+def get_level_exp(level: int) -> int:
+    '''Retorna a quantidade de experiência necessária para
+    passar do nível `level` para o próximo.
+
+    Parameters
+    ----------
+    level: :class:`int`
+        O nível atual.
+
+    Returns
+    -------
+    :class:`int`
+        A experiência necessária para subir de nível.
+    '''
+    return 5 * (level ** 2) + 50 * level + 100
+
+
+def _closed_total_exp(level: int) -> int:
+    # Soma de `get_level_exp(i)` para `i` em `range(level)`:
+    # 5 * Σi² + 50 * Σi + 100 * level.
+    return (5 * (level - 1) * level * (2 * level - 1)) // 6 + 25 * level * (level - 1) + 100 * level
+
+
+# `TOTAL_EXP[n]` é a experiência total necessária para chegar ao nível `n`.
+TOTAL_EXP = tuple(_closed_total_exp(level) for level in range(MAX_TABLE_LEVEL + 1))
+
+
+def get_total_exp(level: int) -> int:
+    '''Retorna a experiência total necessária para chegar a um nível.
+
+    Parameters
+    ----------
+    level: :class:`int`
+        O nível desejado.
+
+    Returns
+    -------
+    :class:`int`
+        A experiência total acumulada até o nível.
+    '''
+    if level <= 0:
+        return 0
+
+    if level <= MAX_TABLE_LEVEL:
+        return TOTAL_EXP[level]
+
+    return _closed_total_exp(level)
+
+
+def get_level_from_exp(exp: int) -> int:
+    '''Retorna o nível correspondente a uma quantidade de experiência.
+
+    Parameters
+    ----------
+    exp: :class:`int`
+        A experiência total do usuário.
+
+    Returns
+    -------
+    :class:`int`
+        O nível do usuário.
+    '''
+    if exp <= TOTAL_EXP[-1]:
+        return max(bisect_right(TOTAL_EXP, exp) - 1, 0)
+
+    # O total cresce como `5/3 * n³`, então a raiz cúbica
+    # nos dá uma estimativa que só precisa de um ajuste fino.
+    level = int((exp * 3 / 5) ** (1 / 3))
+
+    while _closed_total_exp(level + 1) <= exp:
+        level += 1
+
+    while _closed_total_exp(level) > exp:
+        level -= 1
+
+    return level
+
+
+def get_level_progress(exp: int) -> tuple[int, int, int]:
+    '''Retorna o nível e o progresso até o próximo nível.
+
+    Parameters
+    ----------
+    exp: :class:`int`
+        A experiência total do usuário.
+
+    Returns
+    -------
+    tuple[:class:`int`, :class:`int`, :class:`int`]
+        O nível, a experiência obtida dentro do nível e
+        a experiência necessária para o próximo nível.
+    '''
+    level = get_level_from_exp(exp)
+    return level, exp - get_total_exp(level), get_level_exp(level)
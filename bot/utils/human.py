@@ -30,6 +30,7 @@ obtain one at
 http://mozilla.org/MPL/2.0/.
 '''
 
+import datetime
 from math import log10, floor
 from typing import Union
 
@@ -96,3 +97,36 @@ def suffix_number(n: int, *, ends: list[str] = NUMBER_SUFFIXES) -> str:
     
     num = round(_format_number(n / divide), 2)
     return f'{num}{ends[index]}'
+
+
+def precisedelta(value: Union[datetime.timedelta, float], **kwargs) -> str:
+    '''Versão de `humanize.precisedelta` em português.
+
+    O `humanize` e a tradução pt_BR só são carregados
+    na primeira vez que esta função é usada.
+
+    Parameters
+    ----------
+    value: Union[:class:`datetime.timedelta`, :class:`float`]
+        O intervalo de tempo (ou a quantidade de segundos).
+
+    Returns
+    -------
+    :class:`str`
+        O intervalo de tempo formatado.
+    '''
+    return _get_humanize().precisedelta(value, **kwargs)
+
+
+def _get_humanize():
+    global _humanize
+
+    if _humanize is None:
+        import humanize
+        humanize.activate('pt_BR')
+        _humanize = humanize
+
+    return _humanize
+
+
+_humanize = None
@@ -138,6 +138,84 @@ class FieldPageSource(menus.ListPageSource):
         return embed
 
 
+class AsyncPageSource(menus.PageSource):
+    '''Uma fonte de páginas que busca somente a página pedida.
+
+    Diferente das fontes baseadas em lista, as entradas não precisam
+    existir antes do menu começar. A quantidade de páginas vem de
+    `get_count` e cada página de `get_entries`.
+
+    Parameters
+    ----------
+    per_page: :class:`int`
+        Quantos elementos devem aparecer por página, por padrão é `8`.
+    '''
+    def __init__(self, *, per_page: int = 8):
+        self.per_page = per_page
+        self._max_pages = None
+
+    async def prepare(self):
+        if self._max_pages is not None:
+            return
+
+        pages, left_over = divmod(await self.get_count(), self.per_page)
+
+        if left_over:
+            pages += 1
+
+        self._max_pages = pages
+
+    def is_paginating(self) -> bool:
+        return self._max_pages > 1
+
+    def get_max_pages(self) -> int:
+        return self._max_pages
+
+    async def get_page(self, page_number: int) -> list[Any]:
+        return await self.get_entries(page_number * self.per_page, self.per_page)
+
+    async def get_count(self) -> int:
+        '''Retorna a quantidade total de entradas.
+
+        Returns
+        -------
+        :class:`int`
+            A quantidade de entradas.
+        '''
+        raise NotImplementedError
+
+    async def get_entries(self, offset: int, limit: int) -> list[Any]:
+        '''Busca as entradas de uma página.
+
+        Parameters
+        ----------
+        offset: :class:`int`
+            A posição da primeira entrada da página.
+        limit: :class:`int`
+            A quantidade máxima de entradas da página.
+
+        Returns
+        -------
+        list[:class:`typing.Any`]
+            As entradas da página.
+        '''
+        raise NotImplementedError
+
+
+class AsyncFieldPageSource(AsyncPageSource):
+    '''Formata um menu assíncrono baseado em `dict[:class:`str`, :class:`str`]`.'''
+    async def format_page(self, menu: MenuBase, entries: list[dict[str, str]]):
+        footer = f'Página {menu.current_page + 1}/{self.get_max_pages()}'
+
+        embed = menu.ctx.get_embed()
+        embed.set_footer(text=footer)
+
+        for field in entries:
+            embed.add_field(**field)
+
+        return embed
+
+
 class SourceType(enum.Enum):
     STRING = StringPageSource
     FIELD  = FieldPageSource
@@ -0,0 +1,228 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+import bisect
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+# Limites (em segundos) dos baldes dos histogramas. São os
+# mesmos usados por padrão nos clientes do Prometheus.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Stat:
+    '''Histograma de latência de um listener ou comando, junto
+    com quantas vezes ele falhou e quantos estão rodando agora.
+    '''
+    __slots__ = ('buckets', 'count', 'total', 'max', 'errors', 'in_flight')
+
+    def __init__(self):
+        # O último balde guarda o que passar do maior limite.
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.in_flight = 0
+
+    def observe(self, seconds: float):
+        '''Guarda a duração de uma execução.
+
+        Parameters
+        ----------
+        seconds: :class:`float`
+            Quanto tempo a execução levou.
+        '''
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        '''Estima um quantil a partir dos baldes.
+
+        Parameters
+        ----------
+        q: :class:`float`
+            O quantil desejado, entre `0` e `1`.
+
+        Returns
+        -------
+        :class:`float`
+            O limite do balde onde o quantil está. Caso passe
+            do maior limite, retorna a maior duração vista.
+        '''
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        seen = 0
+
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+
+            if seen >= target:
+                return min(bound, self.max)
+
+        return self.max
+
+
+class Metrics:
+    '''Guarda as estatísticas de cada listener e comando do bot.'''
+
+    def __init__(self):
+        self.stats: dict[tuple[str, str], Stat] = {}
+
+    def get(self, kind: str, name: str) -> Stat:
+        '''Retorna as estatísticas de um listener ou comando,
+        criando-as caso ainda não existam.
+
+        Parameters
+        ----------
+        kind: :class:`str`
+            O tipo, `listener` ou `command`.
+        name: :class:`str`
+            O nome do listener ou do comando.
+
+        Returns
+        -------
+        :class:`Stat`
+            As estatísticas desejadas.
+        '''
+        key = (kind, name)
+        stat = self.stats.get(key)
+
+        if stat is None:
+            stat = self.stats[key] = Stat()
+
+        return stat
+
+    def of_kind(self, kind: str) -> list[tuple[str, Stat]]:
+        '''Retorna as estatísticas de um tipo, das mais lentas
+        (pelo tempo total gasto) para as mais rápidas.
+
+        Parameters
+        ----------
+        kind: :class:`str`
+            O tipo, `listener` ou `command`.
+
+        Returns
+        -------
+        list[tuple[:class:`str`, :class:`Stat`]]
+            O nome e as estatísticas de cada um.
+        '''
+        stats = [(name, stat) for (k, name), stat in self.stats.items() if k == kind]
+        return sorted(stats, key=lambda item: item[1].total, reverse=True)
+
+    def render(self) -> str:
+        '''Formata as estatísticas no formato de texto do Prometheus.
+
+        Returns
+        -------
+        :class:`str`
+            As estatísticas formatadas.
+        '''
+        lines = []
+
+        for kind in ('listener', 'command'):
+            metric = f'eris_{kind}'
+            stats = sorted((name, stat) for (k, name), stat in self.stats.items() if k == kind)
+
+            lines.append(f'# TYPE {metric}_seconds histogram')
+
+            for name, stat in stats:
+                label = f'name="{escape(name)}"'
+                seen = 0
+
+                for bound, count in zip(BUCKETS, stat.buckets):
+                    seen += count
+                    lines.append(f'{metric}_seconds_bucket{{{label},le="{bound}"}} {seen}')
+
+                lines.append(f'{metric}_seconds_bucket{{{label},le="+Inf"}} {stat.count}')
+                lines.append(f'{metric}_seconds_sum{{{label}}} {stat.total}')
+                lines.append(f'{metric}_seconds_count{{{label}}} {stat.count}')
+
+            lines.append(f'# TYPE {metric}_errors_total counter')
+            lines.extend(f'{metric}_errors_total{{name="{escape(name)}"}} {stat.errors}' for name, stat in stats)
+
+            lines.append(f'# TYPE {metric}_in_flight gauge')
+            lines.extend(f'{metric}_in_flight{{name="{escape(name)}"}} {stat.in_flight}' for name, stat in stats)
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value: str) -> str:
+    '''Escapa o valor de uma label do Prometheus.'''
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+async def start_server(metrics: Metrics, port: int, *, host: str = '127.0.0.1'):
+    '''Inicia um servidor HTTP local que expõe as estatísticas
+    em `/metrics`, no formato de texto do Prometheus.
+
+    Parameters
+    ----------
+    metrics: :class:`Metrics`
+        As estatísticas a serem expostas.
+    port: :class:`int`
+        A porta do servidor.
+    host: Optional[:class:`str`]
+        O endereço do servidor, por padrão é `127.0.0.1`.
+
+    Returns
+    -------
+    :class:`aiohttp.web.AppRunner`
+        O servidor, que deve ser finalizado com `cleanup()`.
+    '''
+    # O servidor é opcional, então não precisamos
+    # importá-lo caso ele não seja usado.
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+
+    log.info(f'Metrics server listening on http://{host}:{port}/metrics.')
+    return runner
@@ -0,0 +1,189 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+import time
+import asyncio
+import logging
+import datetime
+import collections
+from typing import Any, Optional
+
+from discord.ext import commands
+
+
+log = logging.getLogger(__name__)
+
+
+# De quanto em quanto tempo (em segundos) o atraso do loop é medido.
+LAG_INTERVAL = 0.5
+
+# A partir de quanto tempo (em segundos) um atraso do
+# loop ou um callback é considerado lento.
+LAG_THRESHOLD  = 0.1
+SLOW_THRESHOLD = 0.05
+
+# Quantas amostras de cada tipo ficam guardadas.
+MAX_SAMPLES = 120
+MAX_SLOW    = 50
+
+
+SlowCallback = collections.namedtuple('SlowCallback', 'when seconds name cog')
+
+
+class LoopMonitor:
+    '''Mede o atraso do event loop e guarda os callbacks (ou passos
+    de tasks) que bloquearam o loop por mais tempo que o limite.
+    '''
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, interval: float = LAG_INTERVAL,
+                 lag_threshold: float = LAG_THRESHOLD, slow_threshold: float = SLOW_THRESHOLD):
+        self.loop = loop
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.slow_threshold = slow_threshold
+
+        self.lags = collections.deque(maxlen=MAX_SAMPLES)
+        self.slow = collections.deque(maxlen=MAX_SLOW)
+
+        self._task = None
+        self._original_run = None
+
+    def start(self):
+        '''Começa a medir o atraso do loop e a duração dos callbacks.'''
+        if self._task is not None:
+            return
+
+        # Todos os callbacks do loop (inclusive cada passo de uma task)
+        # passam pelo `Handle._run`, então medimos a duração dele.
+        original_run = self._original_run = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle):
+            start = time.perf_counter()
+
+            try:
+                original_run(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+
+                if elapsed >= monitor.slow_threshold:
+                    monitor.record_slow(handle, elapsed)
+
+        asyncio.events.Handle._run = _run
+        self._task = self.loop.create_task(self.sample_lag())
+
+    def stop(self):
+        '''Para de medir e restaura o `Handle._run` original.'''
+        if self._task is None:
+            return
+
+        asyncio.events.Handle._run = self._original_run
+        self._task.cancel()
+
+        self._task = None
+        self._original_run = None
+
+    async def sample_lag(self):
+        # O atraso é quanto o `sleep` demorou além do esperado,
+        # ou seja, quanto tempo o loop ficou ocupado com outra coisa.
+        while True:
+            start = self.loop.time()
+            await asyncio.sleep(self.interval)
+
+            lag = self.loop.time() - start - self.interval
+            self.lags.append(lag)
+
+            if lag >= self.lag_threshold:
+                log.warning(f'Event loop lagged {lag * 1000:.0f}ms behind.')
+
+    def record_slow(self, handle: asyncio.Handle, seconds: float):
+        '''Guarda um callback que bloqueou o loop.
+
+        Parameters
+        ----------
+        handle: :class:`asyncio.Handle`
+            O callback que foi executado.
+        seconds: :class:`float`
+            Quanto tempo o callback levou.
+        '''
+        name, cog = describe(handle._callback)
+
+        self.slow.append(SlowCallback(datetime.datetime.utcnow(), seconds, name, cog))
+
+        where = f' (cog {cog})' if cog else ''
+        log.warning(f'Callback {name}{where} blocked the event loop for {seconds * 1000:.0f}ms.')
+
+    @property
+    def lag(self) -> float:
+        '''A última medição do atraso do loop, em segundos.'''
+        return self.lags[-1] if self.lags else 0.0
+
+
+def describe(callback: Any) -> tuple[str, Optional[str]]:
+    '''Descreve um callback do loop: quais corotinas ele estava
+    executando e de qual cog elas são.
+
+    Parameters
+    ----------
+    callback: :class:`typing.Any`
+        O callback do `Handle`.
+
+    Returns
+    -------
+    tuple[:class:`str`, Optional[:class:`str`]]
+        O nome do callback e o nome do cog, caso tenha um.
+    '''
+    owner = getattr(callback, '__self__', None)
+
+    if not isinstance(owner, asyncio.Task):
+        name = getattr(callback, '__qualname__', None) or repr(callback)
+        return name, None
+
+    # Um passo de uma task: seguimos a corrente de `await`s para
+    # saber onde ela parou, que é próximo de quem demorou.
+    coro = owner.get_coro()
+    names = []
+    cog = None
+
+    while coro is not None and hasattr(coro, 'cr_await'):
+        names.append(coro.__qualname__)
+
+        frame = coro.cr_frame
+
+        if cog is None and frame is not None:
+            instance = frame.f_locals.get('self')
+
+            if isinstance(instance, commands.Cog):
+                cog = instance.qualified_name
+
+        coro = coro.cr_await
+
+    return ' > '.join(names) or repr(owner), cog
@@ -0,0 +1,119 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+import sys
+import json
+import time
+import datetime
+import contextlib
+from typing import Iterator
+
+
+class StartupProfiler:
+    '''Guarda quanto tempo cada fase da inicialização levou.
+
+    O relógio começa quando o profiler é criado, então ele deve
+    ser criado o mais cedo possível, antes dos imports pesados.
+    '''
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = datetime.datetime.utcnow()
+
+        # Duração de cada fase e o momento (desde o início)
+        # em que cada marco da inicialização aconteceu.
+        self.phases = {}
+        self.marks = {}
+
+    def record(self, phase: str, seconds: float):
+        '''Guarda a duração de uma fase.
+
+        Parameters
+        ----------
+        phase: :class:`str`
+            O nome da fase.
+        seconds: :class:`float`
+            Quanto tempo a fase levou.
+        '''
+        self.phases[phase] = seconds
+
+    def mark(self, name: str):
+        '''Guarda o momento em que um marco aconteceu.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            O nome do marco.
+        '''
+        self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        '''Mede a duração do bloco como uma fase.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            O nome da fase.
+        '''
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> dict:
+        '''Retorna o relatório da inicialização.
+
+        Returns
+        -------
+        :class:`dict`
+            O relatório em um formato serializável em JSON.
+        '''
+        return {
+            'started_at': self.started_at.isoformat(),
+            'python': sys.version.split()[0],
+            'phases': [{'name': name, 'seconds': round(seconds, 6)} for name, seconds in self.phases.items()],
+            'marks': {name: round(seconds, 6) for name, seconds in self.marks.items()},
+            'total': round(time.perf_counter() - self.started, 6)
+        }
+
+    def dump(self, path: str):
+        '''Salva o relatório da inicialização em um arquivo JSON.
+
+        Parameters
+        ----------
+        path: :class:`str`
+            O caminho do arquivo.
+        '''
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=4)
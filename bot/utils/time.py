@@ -31,15 +31,28 @@ http://mozilla.org/MPL/2.0/.
 '''
 
 import re
+import functools
 from datetime import datetime
 
-import parsedatetime as pdt
 from discord.ext import commands
-from dateutil.relativedelta import relativedelta
 
 from .context import ErisContext
 
 
+# O `parsedatetime` e o `dateutil` são importados somente quando
+# forem usados, já que importá-los (e criar o calendário) é caro.
+@functools.lru_cache(maxsize=None)
+def get_calendar():
+    '''Retorna o calendário em pt_BR usado para interpretar datas.'''
+    import parsedatetime as pdt
+    return pdt.Calendar(pdt.Constants('pt_BR'), version=pdt.VERSION_CONTEXT_STYLE)
+
+
+def relativedelta(**kwargs):
+    from dateutil.relativedelta import relativedelta
+    return relativedelta(**kwargs)
+
+
 class InvalidTime(commands.BadArgument):
     def __init__(self, message: str = 'Invalid time provided'):
         super().__init__(message)
@@ -73,11 +86,9 @@ class ShortTime:
 
 
 class HumanTime:
-    calendar = pdt.Calendar(pdt.Constants('pt_BR'), version=pdt.VERSION_CONTEXT_STYLE)
-
     def __init__(self, argument: str, *, now: datetime = None):
         now = now or datetime.utcnow()
-        dt, status = self.calendar.parseDT(argument, sourceTime=now)
+        dt, status = get_calendar().parseDT(argument, sourceTime=now)
 
         if not status.hasDateOrTime:
             raise InvalidTime()
@@ -150,7 +161,7 @@ class UserFriendlyTime(commands.Converter):
     async def convert(self, ctx: ErisContext, argument: str):
         result = self.copy()
 
-        calendar = HumanTime.calendar
+        calendar = get_calendar()
         regex = ShortTime.compiled
         
         now = ctx.message.created_at
@@ -181,7 +192,7 @@ class UserFriendlyTime(commands.Converter):
         if not status.hasTime:
             dt = dt.replace(hour=now.hour, minute=now.minute, second=now.second, microsecond=now.microsecond)
 
-        if status.accuracy == pdt.pdtContext.ACU_HALFDAY:
+        if status.accuracy == status.ACU_HALFDAY:
             dt = dt.replace(day=now.day + 1)
 
         result.datetime = dt
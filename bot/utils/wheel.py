@@ -0,0 +1,106 @@
+'''
+MIT License
+
+Copyright (c) 2021 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+'''
+This Source Code Form is subject to the
+terms of the Mozilla Public License, v.
+2.0. If a copy of the MPL was not
+distributed with this file, You can
+obtain one at
+http://mozilla.org/MPL/2.0/.
+'''
+
+import math
+from typing import Any
+
+
+class TimingWheel:
+    '''Uma roda de tempo (hashed timing wheel). Os itens ficam em um
+    número fixo de compartimentos e, a cada tick, somente o
+    compartimento atual é verificado. Assim, uma única task consegue
+    cuidar de qualquer quantidade de timers.
+
+    Parameters
+    ----------
+    now: :class:`float`
+        O tempo atual, no mesmo relógio usado em `add`.
+    tick: Optional[:class:`float`]
+        Quantos segundos cada tick representa, por padrão é `1`.
+    size: Optional[:class:`int`]
+        Quantos compartimentos a roda tem, por padrão é `64`.
+    '''
+    def __init__(self, now: float, *, tick: float = 1.0, size: int = 64):
+        self.tick = tick
+        self.size = size
+
+        # O tempo que o compartimento atual representa.
+        self.now = now
+        self.cursor = 0
+
+        # Cada compartimento guarda pares de (voltas restantes, item).
+        self.slots = [[] for _ in range(size)]
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, deadline: float, item: Any):
+        '''Adiciona um item para ser retornado em um tick futuro.
+
+        Parameters
+        ----------
+        deadline: :class:`float`
+            Quando o item deve ser retornado.
+        item: :class:`typing.Any`
+            O item.
+        '''
+        # Itens atrasados saem no próximo tick.
+        ticks = max(math.ceil((deadline - self.now) / self.tick), 1)
+
+        slot = (self.cursor + ticks) % self.size
+        rounds = (ticks - 1) // self.size
+
+        self.slots[slot].append((rounds, item))
+        self.count += 1
+
+    def advance(self) -> list[Any]:
+        '''Avança a roda em um tick.
+
+        Returns
+        -------
+        list[:class:`typing.Any`]
+            Os itens que expiraram neste tick.
+        '''
+        self.cursor = (self.cursor + 1) % self.size
+        self.now += self.tick
+
+        bucket = self.slots[self.cursor]
+
+        if not bucket:
+            return []
+
+        due = [item for rounds, item in bucket if rounds == 0]
+        self.slots[self.cursor] = [(rounds - 1, item) for rounds, item in bucket if rounds > 0]
+
+        self.count -= len(due)
+        return due